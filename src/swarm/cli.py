@@ -20,7 +20,7 @@
 
 import typer
 
-from .commands import agent, init, lock, logs, monitor, path_cmd, start, task, terminal, tui
+from .commands import agent, init, lock, logs, monitor, path_cmd, start, task, terminal
 from .utils import create_console, get_version
 
 NO_HELP_CONTEXT_SETTINGS = {
@@ -40,6 +40,14 @@ app = typer.Typer(
 # Консоль для вывода
 console = create_console()
 
+
+def _run_tui():
+    """Запускает TUI-монитор (Textual импортируется только здесь)."""
+    from .commands.tui import run_tui
+
+    run_tui()
+
+
 # Регистрируем подкоманды
 app.command(name="init", help="Инициализирует среду SWARM в текущей директории", add_help_option=False)(
     init.init_command
@@ -67,7 +75,7 @@ app.command(name="unlock", help="Снимает блокировку с файл
 app.command(name="start", help="Сигнализирует агентам о начале работы", add_help_option=False)(start.start_command)
 app.command(name="monitor", help="Запускает live-дашборд мониторинга", add_help_option=False)(monitor.monitor_command)
 app.command(name="path", help="Добавляет пользовательский Python Scripts в PATH", add_help_option=False)(path_cmd.path_command)
-app.command(name="tui", help="Запускает TUI-монитор со скроллингом", add_help_option=False)(tui.run_tui)
+app.command(name="tui", help="Запускает TUI-монитор со скроллингом", add_help_option=False)(_run_tui)
 app.command(name="logs", help="Показывает журнал событий", add_help_option=False)(logs.logs_command)
 app.add_typer(
     terminal.app,
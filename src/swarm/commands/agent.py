@@ -8,6 +8,7 @@
 - swarm status — статус агента
 """
 
+import functools
 import os
 import uuid
 from datetime import UTC, datetime
@@ -15,7 +16,7 @@ from datetime import UTC, datetime
 import typer
 from rich.panel import Panel
 from rich.prompt import Prompt
-from rich.table import Table
+from rich.text import Text
 
 from ..db import (
     claim_next_task,
@@ -29,13 +30,74 @@ from ..db import (
     update_agent_heartbeat,
     update_agent_status,
 )
-from ..models import AgentStatus
+from ..models import Agent, AgentStatus
 from ..utils import CLI_TYPES, VALID_ROLES, create_console
 from ..utils import check_db as _check_db
-from .common import _check_agent
+from .common import AGENT_OPTION, _check_agent
 
 console = create_console()
 
+# Цвета статусов агента в таблице `swarm agents`
+_STATUS_COLORS = {
+    AgentStatus.IDLE: "dim",
+    AgentStatus.WORKING: "green",
+    AgentStatus.WAITING: "yellow",
+    AgentStatus.DONE: "blue",
+}
+
+# Иконки статусов агента в `swarm status`
+_STATUS_EMOJI = {
+    AgentStatus.IDLE: "💤",
+    AgentStatus.WORKING: "🔄",
+    AgentStatus.WAITING: "⏳",
+    AgentStatus.DONE: "✓",
+}
+
+
+def _format_heartbeat_age(secs: int) -> str:
+    """Форматирует возраст heartbeat: '5с назад', '3мин назад', '1ч назад'."""
+    if secs < 60:
+        return f"{secs}с назад"
+    elif secs < 3600:
+        return f"{int(secs / 60)}мин назад"
+    else:
+        return f"{int(secs / 3600)}ч назад"
+
+
+@functools.cache
+def _status_cell(status: AgentStatus) -> Text:
+    """Готовая ячейка статуса: разметка разбирается один раз на статус."""
+    color = _STATUS_COLORS.get(status, "white")
+    return Text.from_markup(f"[{color}]{status.value}[/{color}]")
+
+
+def _heartbeat_cell(agent: Agent, now: datetime) -> str:
+    """Форматирует ячейку heartbeat с подсветкой устаревших значений."""
+    if not agent.last_heartbeat:
+        return "-"
+    secs = int((now - agent.last_heartbeat).total_seconds())
+    hb_str = _format_heartbeat_age(secs)
+
+    # Старый heartbeat — это предупреждение, а не признак смерти процесса.
+    # PID проверяем только для таких агентов: это дорогой внешний вызов на Windows.
+    if secs > 300:
+        pid_alive = is_process_alive(agent.pid) if agent.pid is not None else None
+        hb_str = f"[yellow]{hb_str} (PID жив)[/yellow]" if pid_alive is True else f"[red]{hb_str}[/red]"
+    return hb_str
+
+
+def _agent_row(agent: Agent, now: datetime) -> tuple:
+    """Собирает строку таблицы `swarm agents`."""
+    return (
+        f"#{agent.agent_id}",
+        agent.cli_type,
+        agent.name,
+        agent.role,
+        _status_cell(agent.status),
+        f"#{agent.current_task_id}" if agent.current_task_id else "-",
+        _heartbeat_cell(agent, now),
+    )
+
 
 def join_command(
     cli_type: str | None = typer.Option(None, "--cli", "-c", help="Тип CLI (claude/codex/gemini)"),
@@ -84,7 +146,7 @@ def join_command(
         raise typer.Exit(1)
 
     # Генерируем session token
-    session_token = str(uuid.uuid4())
+    session_token = uuid.uuid4().hex
     pid = os.getpid()
 
     # Регистрируем агента
@@ -130,6 +192,8 @@ def agents_command(
     """
     Показывает список зарегистрированных агентов.
     """
+    from rich.table import Table
+
     _check_db()
 
     if cleanup:
@@ -155,73 +219,33 @@ def agents_command(
     table.add_column("Задача", width=8)
     table.add_column("Heartbeat", width=15)
 
-    status_colors = {
-        AgentStatus.IDLE: "dim",
-        AgentStatus.WORKING: "green",
-        AgentStatus.WAITING: "yellow",
-        AgentStatus.DONE: "blue",
-    }
-
     now = datetime.now(UTC).replace(tzinfo=None)
 
     for agent in agents:
-        color = status_colors.get(agent.status, "white")
-        pid_alive = is_process_alive(agent.pid) if agent.pid is not None else None
-
-        # Вычисляем время с последнего heartbeat
-        if agent.last_heartbeat:
-            delta = now - agent.last_heartbeat
-            if delta.total_seconds() < 60:
-                hb_str = f"{int(delta.total_seconds())}с назад"
-            elif delta.total_seconds() < 3600:
-                hb_str = f"{int(delta.total_seconds() / 60)}мин назад"
-            else:
-                hb_str = f"{int(delta.total_seconds() / 3600)}ч назад"
-
-            # Старый heartbeat — это предупреждение, а не признак смерти процесса
-            if delta.total_seconds() > 300 and pid_alive is not True:
-                hb_str = f"[red]{hb_str}[/red]"
-            elif delta.total_seconds() > 300:
-                hb_str = f"[yellow]{hb_str} (PID жив)[/yellow]"
-        else:
-            hb_str = "-"
-
-        task_str = f"#{agent.current_task_id}" if agent.current_task_id else "-"
-
-        table.add_row(
-            f"#{agent.agent_id}",
-            agent.cli_type,
-            agent.name,
-            agent.role,
-            f"[{color}]{agent.status.value}[/{color}]",
-            task_str,
-            hb_str,
-        )
+        table.add_row(*_agent_row(agent, now))
 
     console.print(table)
     console.print(f"\nВсего агентов: {len(agents)}")
 
 
 def next_command(
-    agent_name: str | None = typer.Option(None, "--agent", "-a", help="Имя агента (если не указан — из сессии)"),
+    agent_name: str | None = AGENT_OPTION,
 ):
     """
     Получает следующую задачу для агента.
     """
     agent = _check_agent(agent_name)
 
-    # Обновляем heartbeat
-    update_agent_heartbeat(agent.agent_id)
-
     # Проверяем, нет ли уже активной задачи
     if agent.current_task_id is not None:
+        update_agent_heartbeat(agent.agent_id)
         console.print(
             f"[yellow]⚠ У вас уже есть активная задача #{agent.current_task_id}[/yellow]\n"
             "Завершите её командой: [cyan]swarm done --summary \"...\"[/cyan]"
         )
         raise typer.Exit(1)
 
-    # Получаем задачу
+    # Получаем задачу (heartbeat обновляется в той же транзакции)
     task = claim_next_task(agent)
 
     if task is None:
@@ -249,7 +273,7 @@ def next_command(
 
 def done_command(
     summary: str = typer.Option(..., "--summary", "-s", help="Резюме выполненной работы"),
-    agent_name: str | None = typer.Option(None, "--agent", "-a", help="Имя агента (если не указан — из сессии)"),
+    agent_name: str | None = AGENT_OPTION,
 ):
     """
     Завершает текущую задачу агента.
@@ -276,7 +300,7 @@ def done_command(
 
 
 def status_command(
-    agent_name: str | None = typer.Option(None, "--agent", "-a", help="Имя агента (если не указан — из сессии)"),
+    agent_name: str | None = AGENT_OPTION,
 ):
     """
     Показывает статус текущего агента.
@@ -286,14 +310,7 @@ def status_command(
     # Обновляем heartbeat
     update_agent_heartbeat(agent.agent_id)
 
-    status_emoji = {
-        AgentStatus.IDLE: "💤",
-        AgentStatus.WORKING: "🔄",
-        AgentStatus.WAITING: "⏳",
-        AgentStatus.DONE: "✓",
-    }
-
-    emoji = status_emoji.get(agent.status, "")
+    emoji = _STATUS_EMOJI.get(agent.status, "")
 
     info = [
         f"ID: [cyan]#{agent.agent_id}[/cyan]",
@@ -316,7 +333,7 @@ def status_command(
 
 
 def heartbeat_command(
-    agent_name: str | None = typer.Option(None, "--agent", "-a", help="Имя агента (если не указан — из сессии)"),
+    agent_name: str | None = AGENT_OPTION,
     quiet: bool = typer.Option(False, "--quiet", "-q", help="Не печатать подтверждение"),
 ):
     """
@@ -12,6 +12,9 @@ from ..utils import create_console
 
 console = create_console()
 
+# Общая опция --agent/-a для команд агента (один OptionInfo на все сигнатуры)
+AGENT_OPTION = typer.Option(None, "--agent", "-a", help="Имя агента (если не указан — из сессии)")
+
 
 def _check_agent(agent_name: str | None = None):
   """
@@ -7,13 +7,14 @@
 - Создаёт папки с SKILL.md для каждого типа агента
 """
 
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import typer
 from rich.panel import Panel
-from rich.table import Table
 
-from ..db import DB_FILENAME, init_database
+from ..db import DB_FILENAME, close_connections, init_database
 from ..utils import CLI_TYPES, create_console, get_version
 
 console = create_console()
@@ -451,6 +452,27 @@ swarm done --summary "Добавлен UserController с CRUD, файлы: user.
 '''
 
 
+@functools.cache
+def _skill_bytes(cli_type: str | None = None) -> bytes:
+    """Возвращает SKILL.md в UTF-8: агента для cli_type или оркестратора при None.
+
+    Шаблоны собираются и кодируются один раз на процесс, а не на каждый файл.
+    """
+    template = get_orchestrator_skill_template() if cli_type is None else get_skill_template(cli_type)
+    return template.encode("utf-8")
+
+
+def _write_skill(base_dir: Path, cli_type: str, skill_name: str, content: bytes, force: bool) -> bool:
+    """Записывает .<cli>/skills/<skill>/SKILL.md. Возвращает True, если файл создан."""
+    skill_dir = base_dir / f".{cli_type}" / "skills" / skill_name
+    skill_file = skill_dir / "SKILL.md"
+    if skill_file.exists() and not force:
+        return False
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    skill_file.write_bytes(content)
+    return True
+
+
 def init_command(
     force: bool = typer.Option(False, "--force", "-f", help="Перезаписать существующую БД"),
 ):
@@ -459,6 +481,8 @@ def init_command(
 
     Создаёт swarm.db и папки со SKILL.md для каждого типа агента.
     """
+    from rich.table import Table
+
     current_dir = Path.cwd()
     db_path = current_dir / DB_FILENAME
 
@@ -469,16 +493,11 @@ def init_command(
         )
         raise typer.Exit(1)
 
-    # Удаляем старую БД если force
-    if db_path.exists() and force:
-        db_path.unlink()
-        # Удаляем также WAL-файлы
-        wal_path = current_dir / f"{DB_FILENAME}-wal"
-        shm_path = current_dir / f"{DB_FILENAME}-shm"
-        if wal_path.exists():
-            wal_path.unlink()
-        if shm_path.exists():
-            shm_path.unlink()
+    # Удаляем старую БД и её WAL-файлы, если force (отсутствующие файлы пропускаем)
+    if force:
+        close_connections()
+        for path in (db_path, current_dir / f"{DB_FILENAME}-wal", current_dir / f"{DB_FILENAME}-shm"):
+            path.unlink(missing_ok=True)
 
     # Создаём БД
     try:
@@ -491,44 +510,39 @@ def init_command(
     for sub in ["sessions", "specs", "pids"]:
         (current_dir / ".swarm" / sub).mkdir(parents=True, exist_ok=True)
 
-    # Создаём структуру папок для каждого типа агента
-    skills_created = []
-    for cli_type in CLI_TYPES:
-        skill_dir = current_dir / f".{cli_type}" / "skills" / "swarm-agent"
-        skill_file = skill_dir / "SKILL.md"
-
-        if not skill_file.exists() or force:
-            skill_dir.mkdir(parents=True, exist_ok=True)
-            skill_file.write_text(get_skill_template(cli_type), encoding="utf-8")
-            skills_created.append(cli_type)
-
-    # Создаём скилл оркестратора для всех CLI
-    orchestrator_created = []
-    for cli_type in CLI_TYPES:
-        orchestrator_dir = current_dir / f".{cli_type}" / "skills" / "swarm-orchestrator"
-        orchestrator_file = orchestrator_dir / "SKILL.md"
-        if not orchestrator_file.exists() or force:
-            orchestrator_dir.mkdir(parents=True, exist_ok=True)
-            orchestrator_file.write_text(get_orchestrator_skill_template(), encoding="utf-8")
-            orchestrator_created.append(cli_type)
+    # Создаём скиллы агента и оркестратора для каждого типа CLI.
+    # Файлы независимы, поэтому пишем их параллельно; порядок результатов сохраняется.
+    def write_skills(cli_type: str) -> tuple[bool, bool]:
+        return (
+            _write_skill(current_dir, cli_type, "swarm-agent", _skill_bytes(cli_type), force),
+            _write_skill(current_dir, cli_type, "swarm-orchestrator", _skill_bytes(), force),
+        )
+
+    with ThreadPoolExecutor(max_workers=len(CLI_TYPES)) as executor:
+        results = list(executor.map(write_skills, CLI_TYPES))
+
+    skills_created = [cli_type for cli_type, (agent, _) in zip(CLI_TYPES, results, strict=True) if agent]
+    orchestrator_created = [cli_type for cli_type, (_, orch) in zip(CLI_TYPES, results, strict=True) if orch]
 
     # Выводим результат
     console.print()
 
-    skills_info = ""
+    parts = [
+        f"[green]✓ SWARM v{get_version()} инициализирован успешно![/green]\n\n",
+        f"База данных: [cyan]{db_path}[/cyan]",
+    ]
     if skills_created:
-        skills_info = "\n\nСозданы SKILL.md для агентов:\n"
-        for cli_type in skills_created:
-            skills_info += f"  • [cyan].{cli_type}/skills/swarm-agent/SKILL.md[/cyan]\n"
+        parts.append("\n\nСозданы SKILL.md для агентов:\n")
+        parts.extend(f"  • [cyan].{cli_type}/skills/swarm-agent/SKILL.md[/cyan]\n" for cli_type in skills_created)
     if orchestrator_created:
-        skills_info += "\nСоздан SKILL.md оркестратора:\n"
-        for cli_type in orchestrator_created:
-            skills_info += f"  • [cyan].{cli_type}/skills/swarm-orchestrator/SKILL.md[/cyan]\n"
+        parts.append("\nСоздан SKILL.md оркестратора:\n")
+        parts.extend(
+            f"  • [cyan].{cli_type}/skills/swarm-orchestrator/SKILL.md[/cyan]\n" for cli_type in orchestrator_created
+        )
 
     console.print(
         Panel.fit(
-            f"[green]✓ SWARM v{get_version()} инициализирован успешно![/green]\n\n"
-            f"База данных: [cyan]{db_path}[/cyan]" + skills_info,
+            "".join(parts),
             title=f"SWARM Init v{get_version()}",
             border_style="green",
         )
@@ -5,17 +5,20 @@
 - swarm unlock — снятие блокировки
 """
 
+import random
 import time
 from pathlib import Path
 
 import typer
 
 from ..db import (
+    get_agent_by_id,
     get_agent_lock,
-    get_all_agents,
     get_all_locks,
     get_file_lock,
     log_event,
+    log_events,
+    transaction,
     try_lock_file,
     unlock_file,
     update_agent_heartbeat,
@@ -24,15 +27,24 @@ from ..db import (
 from ..models import AgentStatus, EventType
 from ..utils import check_db as _check_db
 from ..utils import create_console
-from .common import _check_agent
+from .common import AGENT_OPTION, _check_agent
 
 console = create_console()
 
+# Ожидание блокировки: первый интервал опроса и его потолок (секунды).
+# Короткий старт быстро подхватывает файл после коротких блокировок;
+# потолок прежний — каждая попытка открывает BEGIN IMMEDIATE в общей БД.
+LOCK_POLL_START = 0.05
+LOCK_POLL_MAX = 15.0
+
+# Как часто ожидающий агент обновляет heartbeat (секунды)
+LOCK_HEARTBEAT_INTERVAL = 30.0
+
 
 def lock_command(
     file_path: str = typer.Argument(..., help="Файл для блокировки"),
     timeout: int = typer.Option(300, "--timeout", "-t", help="Таймаут ожидания в секундах"),
-    agent_name: str | None = typer.Option(None, "--agent", "-a", help="Имя агента (если не указан — из сессии)"),
+    agent_name: str | None = AGENT_OPTION,
 ):
     """
     Захватывает блокировку на указанный файл.
@@ -62,59 +74,67 @@ def lock_command(
         return
 
     start_time = time.time()
+    last_heartbeat = start_time
     waiting_logged = False
-    sleep_interval = 1.0  # Начальный интервал
-    max_sleep = 15.0  # Верхний предел
+    prev_holder: int | None = None
+    sleep_interval = LOCK_POLL_START
 
     while True:
-        # Пытаемся захватить блокировку
+        # Пытаемся захватить блокировку; конкуренцию за запись в БД
+        # разруливает busy_timeout соединения, здесь ждём только владельца файла
         if try_lock_file(agent.agent_id, task_id, file_path):
             update_agent_status(agent.agent_id, AgentStatus.WORKING, task_id)
             console.print(f"[green]✓ Заблокирован: {file_path}[/green]")
             return
 
-        # Файл занят — проверяем, кем
+        # Событие ожидания пишем только при смене владельца, а не на каждой попытке
         existing_lock = get_file_lock(file_path)
 
-        if existing_lock:
-            agents = get_all_agents()
-            locker = next(
-                (a for a in agents if a.agent_id == existing_lock.locked_by),
-                None,
-            )
+        if existing_lock and existing_lock.locked_by != prev_holder:
+            prev_holder = existing_lock.locked_by
+            locker = get_agent_by_id(existing_lock.locked_by)
             locker_name = locker.name if locker else f"агент #{existing_lock.locked_by}"
 
-            if not waiting_logged:
-                console.print(
-                    f"[yellow]⏳ Ожидание: {file_path} "
-                    f"(заблокирован {locker_name})[/yellow]"
-                )
+            console.print(
+                f"[yellow]⏳ Ожидание: {file_path} "
+                f"(заблокирован {locker_name})[/yellow]"
+            )
+            with transaction() as conn:
                 log_event(
                     event=EventType.WAITING_FOR_LOCK,
                     agent_id=agent.agent_id,
                     task_id=task_id,
-                    message=f"Ожидание блокировки: {file_path}",
+                    message=f"Ожидание блокировки: {file_path} (держит {locker_name})",
+                    conn=conn,
+                )
+                if not waiting_logged:
+                    update_agent_status(agent.agent_id, AgentStatus.WAITING, task_id, conn=conn)
+            waiting_logged = True
+
+        remaining = timeout - (time.time() - start_time)
+        if remaining <= 0:
+            with transaction() as conn:
+                # Восстанавливаем статус агента, чтобы он не застрял в WAITING
+                if waiting_logged:
+                    update_agent_status(agent.agent_id, AgentStatus.WORKING, task_id, conn=conn)
+                log_event(
+                    event=EventType.ERROR,
+                    agent_id=agent.agent_id,
+                    task_id=task_id,
+                    message=f"Таймаут блокировки: {file_path}",
+                    conn=conn,
                 )
-                update_agent_status(agent.agent_id, AgentStatus.WAITING, task_id)
-                waiting_logged = True
-
-        elapsed = time.time() - start_time
-        if elapsed >= timeout:
-            # Восстанавливаем статус агента, чтобы он не застрял в WAITING
-            if waiting_logged:
-                update_agent_status(agent.agent_id, AgentStatus.WORKING, task_id)
             console.print(f"[red]✗ Таймаут ожидания: {file_path}[/red]")
-            log_event(
-                event=EventType.ERROR,
-                agent_id=agent.agent_id,
-                task_id=task_id,
-                message=f"Таймаут блокировки: {file_path}",
-            )
             raise typer.Exit(1)
 
-        update_agent_heartbeat(agent.agent_id)
-        time.sleep(sleep_interval)
-        sleep_interval = min(sleep_interval * 2, max_sleep)
+        if time.time() - last_heartbeat >= LOCK_HEARTBEAT_INTERVAL:
+            update_agent_heartbeat(agent.agent_id)
+            last_heartbeat = time.time()
+
+        # Джиттер разводит по времени агентов, ждущих один файл;
+        # дольше оставшегося таймаута не спим
+        time.sleep(min(sleep_interval * random.uniform(0.5, 1.0), remaining))
+        sleep_interval = min(sleep_interval * 2, LOCK_POLL_MAX)
 
 
 def unlock_command(
@@ -138,14 +158,24 @@ def unlock_command(
             console.print("[yellow]Нет активных блокировок[/yellow]")
             return
 
-        for lock in locks:
-            unlock_file(lock.file_path, force=True)
-            log_event(
-                event=EventType.FILE_UNLOCKED,
-                task_id=lock.task_id,
-                agent_id=lock.locked_by,
-                message=f"Принудительно разблокирован файл: {lock.file_path}",
+        # Все удаления и события — одной транзакцией
+        with transaction() as conn:
+            for lock in locks:
+                unlock_file(lock.file_path, force=True, conn=conn)
+            log_events(
+                [
+                    (
+                        EventType.FILE_UNLOCKED,
+                        lock.task_id,
+                        lock.locked_by,
+                        f"Принудительно разблокирован файл: {lock.file_path}",
+                    )
+                    for lock in locks
+                ],
+                conn=conn,
             )
+
+        for lock in locks:
             console.print(f"[green]✓ Разблокирован: {lock.file_path}[/green]")
 
         console.print(f"\n[green]Снято блокировок: {len(locks)}[/green]")
@@ -5,14 +5,42 @@
 """
 
 import typer
-from rich.table import Table
 
 from ..db import get_all_agents, get_recent_events
+from ..models import EventType
 from ..utils import check_db as _check_db
-from ..utils import create_console
+from ..utils import create_console, enum_markup
 
 console = create_console()
 
+# Цвет по типу события
+_EVENT_STYLES = {
+    EventType.TASK_STARTED: "green",
+    EventType.TASK_DONE: "blue",
+    EventType.TASK_CREATED: "magenta",
+    EventType.TASK_ASSIGNED: "cyan",
+    EventType.TASK_FORCE_CLOSED: "red",
+    EventType.FILE_LOCKED: "yellow",
+    EventType.FILE_UNLOCKED: "yellow",
+    EventType.WAITING_FOR_LOCK: "red",
+    EventType.ERROR: "red",
+    EventType.AGENT_REGISTERED: "cyan",
+    EventType.AGENT_STARTED: "green",
+    EventType.AGENT_CLEANUP: "red",
+    EventType.LAUNCH_SESSION_CREATED: "cyan",
+    EventType.LAUNCH_SESSION_APPROVED: "green",
+    EventType.LAUNCH_STARTED: "green",
+    EventType.LAUNCH_AGENT_STARTED: "green",
+    EventType.LAUNCH_AGENT_REGISTERED: "blue",
+    EventType.LAUNCH_AGENT_FAILED: "red",
+    EventType.LAUNCH_SESSION_COMPLETED: "blue",
+    EventType.LAUNCH_SESSION_STOPPED: "yellow",
+}
+
+
+# Готовые ячейки для всех типов событий (неизвестные — белым)
+_EVENT_CELLS = enum_markup(EventType, _EVENT_STYLES, "white", "[{0}]{value}[/{0}]")
+
 
 def logs_command(
     limit: int = typer.Option(50, "--limit", "-n", help="Количество записей (по умолчанию 50)"),
@@ -26,6 +54,8 @@ def logs_command(
     """
     Показывает журнал событий системы.
     """
+    from rich.table import Table
+
     _check_db()
 
     # Получаем агентов для маппинга ID -> имя
@@ -49,9 +79,6 @@ def logs_command(
         console.print("[yellow]Нет событий[/yellow]")
         return
 
-    # Разворачиваем для хронологического порядка
-    events = list(reversed(events))
-
     table = Table(title="Журнал событий SWARM", show_header=True)
     table.add_column("Время", style="dim", width=10)
     table.add_column("Задача", style="cyan", width=7)
@@ -59,33 +86,11 @@ def logs_command(
     table.add_column("Событие", width=15)
     table.add_column("Сообщение", style="white")
 
-    event_styles = {
-        "task_started": "green",
-        "task_done": "blue",
-        "task_created": "magenta",
-        "task_assigned": "cyan",
-        "task_force_closed": "red",
-        "file_locked": "yellow",
-        "file_unlocked": "yellow",
-        "waiting_for_lock": "red",
-        "error": "red",
-        "agent_registered": "cyan",
-        "agent_started": "green",
-        "agent_cleanup": "red",
-        "launch_session_created": "cyan",
-        "launch_session_approved": "green",
-        "launch_started": "green",
-        "launch_agent_started": "green",
-        "launch_agent_registered": "blue",
-        "launch_agent_failed": "red",
-        "launch_session_completed": "blue",
-        "launch_session_stopped": "yellow",
-    }
-
-    for event in events:
+    # Выборка идёт от новых к старым — обходим её с конца без копирования
+    for event in reversed(events):
         # Время
         if event.timestamp:
-            time_str = event.timestamp.strftime("%H:%M:%S")
+            time_str = event.timestamp.time().isoformat("seconds")
         else:
             time_str = "-"
 
@@ -96,10 +101,6 @@ def logs_command(
         agent = agents.get(event.agent_id) if event.agent_id else None
         agent_str = agent.name if agent else "-"
 
-        # Событие
-        event_type = event.event.value
-        style = event_styles.get(event_type, "white")
-
         # Сообщение
         msg = event.message or "-"
 
@@ -107,7 +108,7 @@ def logs_command(
             time_str,
             task_str,
             agent_str,
-            f"[{style}]{event_type}[/{style}]",
+            _EVENT_CELLS[event.event],
             msg,
         )
 
@@ -8,32 +8,79 @@ Live-дашборд с 4 панелями:
 - Панель активности
 """
 
+import functools
 import time
-from datetime import UTC, datetime
+from collections import deque
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
 
 import typer
-from rich.layout import Layout
 from rich.live import Live
 from rich.panel import Panel
-from rich.table import Table
-
-from ..db import (
-    get_all_agents,
-    get_all_locks,
-    get_all_tasks,
-    get_recent_events,
-    is_process_alive,
-)
-from ..models import AgentStatus, TaskStatus
+
+from ..db import is_process_alive, snapshot
+from ..models import Agent, AgentStatus, EventType, Snapshot, Task, TaskLogEntry, TaskStatus
 from ..utils import check_db as _check_db
-from ..utils import create_console
+from ..utils import create_console, enum_markup, truncate, truncate_left
 
-console = create_console()
+if TYPE_CHECKING:
+    # rich.layout тянет rich.pretty и attrs (~20 мс) — импортируем только при запуске монитора
+    from rich.layout import Layout
 
+console = create_console()
 
-def create_agents_panel() -> Panel:
+# Сколько последних событий показывает панель активности
+ACTIVITY_LIMIT = 15
+
+# Потолок интервала обновления, пока в БД ничего не меняется (секунды)
+IDLE_REFRESH_MAX = 10.0
+
+# Целочисленное деление timedelta на секунду даёт int без float-округления
+_SECOND = timedelta(seconds=1)
+
+# Стиль и иконка по статусу агента
+_AGENT_STATUS_STYLES = {
+    AgentStatus.IDLE: ("dim", "💤"),
+    AgentStatus.WORKING: ("green", "🔄"),
+    AgentStatus.WAITING: ("yellow", "⏳"),
+    AgentStatus.DONE: ("blue", "✓"),
+}
+
+# Стиль и иконка по статусу задачи
+_TASK_STATUS_STYLES = {
+    TaskStatus.PENDING: ("yellow", "⏳"),
+    TaskStatus.IN_PROGRESS: ("green", "🔄"),
+    TaskStatus.DONE: ("dim", "✓"),
+    TaskStatus.BLOCKED: ("red", "🚫"),
+}
+
+# Максимальная длина сообщения в панели активности
+_ACTIVITY_MSG_MAX = 35
+
+# Стиль и иконка по типу события в панели активности
+_EVENT_STYLES = {
+    EventType.TASK_STARTED: ("green", "▶"),
+    EventType.TASK_DONE: ("blue", "✓"),
+    EventType.FILE_LOCKED: ("yellow", "🔒"),
+    EventType.FILE_UNLOCKED: ("yellow", "🔓"),
+    EventType.WAITING_FOR_LOCK: ("red", "⏳"),
+    EventType.ERROR: ("red", "✗"),
+    EventType.AGENT_REGISTERED: ("cyan", "➕"),
+    EventType.AGENT_STARTED: ("green", "🚀"),
+}
+
+
+# Ячейки статусов (неизвестные — белым без иконки) и иконки событий (неизвестные — белой точкой)
+_AGENT_STATUS_CELLS = enum_markup(AgentStatus, _AGENT_STATUS_STYLES, ("white", ""), "[{0}]{1} {value}[/{0}]")
+_TASK_STATUS_CELLS = enum_markup(TaskStatus, _TASK_STATUS_STYLES, ("white", ""), "[{0}]{1} {value}[/{0}]")
+_EVENT_ICONS = enum_markup(EventType, _EVENT_STYLES, ("white", "•"), "[{0}]{1}[/{0}]")
+
+
+def create_agents_panel(snap: Snapshot) -> Panel:
     """Создаёт панель агентов."""
-    agents = get_all_agents()
+    from rich.table import Table
+
+    agents = snap.agents
 
     if not agents:
         return Panel(
@@ -51,23 +98,12 @@ def create_agents_panel() -> Panel:
     table.add_column("Задача", width=6)
     table.add_column("HB", width=8)
 
-    status_styles = {
-        AgentStatus.IDLE: ("dim", "💤"),
-        AgentStatus.WORKING: ("green", "🔄"),
-        AgentStatus.WAITING: ("yellow", "⏳"),
-        AgentStatus.DONE: ("blue", "✓"),
-    }
-
     now = datetime.now(UTC).replace(tzinfo=None)
 
     for agent in agents:
-        style, icon = status_styles.get(agent.status, ("white", ""))
-        pid_alive = is_process_alive(agent.pid) if agent.pid is not None else None
-
         # Heartbeat
         if agent.last_heartbeat:
-            delta = now - agent.last_heartbeat
-            secs = int(delta.total_seconds())
+            secs = (now - agent.last_heartbeat) // _SECOND
             if secs < 60:
                 hb = f"{secs}с"
             elif secs < 3600:
@@ -75,11 +111,11 @@ def create_agents_panel() -> Panel:
             else:
                 hb = f"{secs // 3600}ч"
 
-            # Старый heartbeat — это предупреждение, а не автоматический признак зависания
-            if secs > 300 and pid_alive is not True:
-                hb = f"[red]{hb}[/red]"
-            elif secs > 300:
-                hb = f"[yellow]{hb}*[/yellow]"
+            # Старый heartbeat — это предупреждение, а не автоматический признак зависания.
+            # PID проверяем только для таких агентов: на Windows это вызов tasklist.
+            if secs > 300:
+                pid_alive = is_process_alive(agent.pid) if agent.pid is not None else None
+                hb = f"[yellow]{hb}*[/yellow]" if pid_alive is True else f"[red]{hb}[/red]"
         else:
             hb = "-"
 
@@ -90,7 +126,7 @@ def create_agents_panel() -> Panel:
             agent.cli_type,
             agent.name,
             agent.role,
-            f"[{style}]{icon} {agent.status.value}[/{style}]",
+            _AGENT_STATUS_CELLS[agent.status],
             task_str,
             hb,
         )
@@ -102,12 +138,38 @@ def create_agents_panel() -> Panel:
     )
 
 
-def create_tasks_panel(show_done: bool = False, full_desc: bool = False) -> Panel:
+def _task_lines(task: Task, agents: dict[int, Agent]) -> str:
+    """Две строки задачи для режима --full: заголовок и описание (до 80 символов)."""
+    assigned_str = f"→[cyan]{task.target_name}[/cyan]" if task.target_name else ""
+    role_str = f"[yellow]{task.target_role}[/yellow]" if task.target_role else ""
+    depends_str = f"[dim]после #{task.depends_on}[/dim]" if task.depends_on else ""
+
+    # Имя агента вместо ID
+    if task.assigned_to:
+        agent = agents.get(task.assigned_to)
+        working_name = agent.name if agent else f"#{task.assigned_to}"
+        working_str = f"[green][{working_name}][/green]"
+    else:
+        working_str = ""
+
+    desc = truncate(task.description, 80)
+
+    return (
+        f"[bold cyan]#{task.task_id}[/bold cyan] P{task.priority} "
+        f"{_TASK_STATUS_CELLS[task.status]} {role_str} {depends_str} {assigned_str} {working_str}\n"
+        f"  {desc}"
+    )
+
+
+def create_tasks_panel(snap: Snapshot, show_done: bool = False, full_desc: bool = False) -> Panel:
     """Создаёт панель задач."""
-    all_tasks = get_all_tasks()
-    agents = {a.agent_id: a for a in get_all_agents()}
+    from rich.table import Table
+
+    all_tasks = snap.tasks
+    agents = snap.agents_by_id
 
-    tasks = all_tasks if show_done else [t for t in all_tasks if t.status != TaskStatus.DONE]
+    active_tasks = [t for t in all_tasks if t.status != TaskStatus.DONE]
+    tasks = all_tasks if show_done else active_tasks
 
     if not tasks:
         return Panel(
@@ -116,41 +178,9 @@ def create_tasks_panel(show_done: bool = False, full_desc: bool = False) -> Pane
             border_style="magenta",
         )
 
-    status_styles = {
-        TaskStatus.PENDING: ("yellow", "⏳"),
-        TaskStatus.IN_PROGRESS: ("green", "🔄"),
-        TaskStatus.DONE: ("dim", "✓"),
-        TaskStatus.BLOCKED: ("red", "🚫"),
-    }
-
     if full_desc:
         # Режим полного описания — список без таблицы
-        lines = []
-        for task in tasks[:50]:
-            style, icon = status_styles.get(task.status, ("white", ""))
-            assigned_str = f"→[cyan]{task.target_name}[/cyan]" if task.target_name else ""
-            role_str = f"[yellow]{task.target_role}[/yellow]" if task.target_role else ""
-            depends_str = f"[dim]после #{task.depends_on}[/dim]" if task.depends_on else ""
-            
-            # Имя агента вместо ID
-            if task.assigned_to:
-                agent = agents.get(task.assigned_to)
-                working_name = agent.name if agent else f"#{task.assigned_to}"
-                working_str = f"[green][{working_name}][/green]"
-            else:
-                working_str = ""
-            
-            lines.append(
-                f"[bold cyan]#{task.task_id}[/bold cyan] P{task.priority} "
-                f"[{style}]{icon} {task.status.value}[/{style}] {role_str} {depends_str} {assigned_str} {working_str}"
-            )
-            # Полное описание (до 80 символов)
-            desc = task.description
-            if len(desc) > 80:
-                desc = desc[:77] + "..."
-            lines.append(f"  {desc}")
-        
-        content = "\n".join(lines)
+        content = "\n".join(_task_lines(task, agents) for task in tasks[:50])
     else:
         # Режим таблицы
         table = Table(show_header=True, header_style="bold", box=None, padding=(0, 1))
@@ -164,7 +194,6 @@ def create_tasks_panel(show_done: bool = False, full_desc: bool = False) -> Pane
         table.add_column("Описание", width=18, overflow="ellipsis")
 
         for task in tasks[:50]:
-            style, icon = status_styles.get(task.status, ("white", ""))
             assigned_str = task.target_name if task.target_name else "-"
             role_str = task.target_role if task.target_role else "-"
             depends_str = f"#{task.depends_on}" if task.depends_on else "-"
@@ -176,14 +205,12 @@ def create_tasks_panel(show_done: bool = False, full_desc: bool = False) -> Pane
             else:
                 working_str = "-"
             
-            desc = task.description
-            if len(desc) > 18:
-                desc = desc[:15] + "..."
+            desc = truncate(task.description, 18)
 
             table.add_row(
                 f"#{task.task_id}",
                 str(task.priority),
-                f"[{style}]{icon} {task.status.value}[/{style}]",
+                _TASK_STATUS_CELLS[task.status],
                 role_str,
                 depends_str,
                 f"[cyan]{assigned_str}[/cyan]",
@@ -193,7 +220,7 @@ def create_tasks_panel(show_done: bool = False, full_desc: bool = False) -> Pane
         content = table
 
     total = len(all_tasks)
-    active = len([t for t in all_tasks if t.status != TaskStatus.DONE])
+    active = len(active_tasks)
 
     return Panel(
         content,
@@ -202,10 +229,12 @@ def create_tasks_panel(show_done: bool = False, full_desc: bool = False) -> Pane
     )
 
 
-def create_locks_panel() -> Panel:
+def create_locks_panel(snap: Snapshot) -> Panel:
     """Создаёт панель блокировок."""
-    locks = get_all_locks()
-    agents = {a.agent_id: a for a in get_all_agents()}
+    from rich.table import Table
+
+    locks = snap.locks
+    agents = snap.agents_by_id
 
     if not locks:
         return Panel(
@@ -227,8 +256,7 @@ def create_locks_panel() -> Panel:
 
         # Время блокировки
         if lock.locked_at:
-            delta = now - lock.locked_at
-            mins = int(delta.total_seconds() / 60)
+            mins = (now - lock.locked_at) // _SECOND // 60
             if mins < 60:
                 time_str = f"{mins}мин"
             else:
@@ -241,9 +269,7 @@ def create_locks_panel() -> Panel:
             time_str = "-"
 
         # Усекаем путь
-        path = lock.file_path
-        if len(path) > 30:
-            path = "..." + path[-27:]
+        path = truncate_left(lock.file_path, 30)
 
         table.add_row(path, agent_name, time_str)
 
@@ -254,10 +280,16 @@ def create_locks_panel() -> Panel:
     )
 
 
-def create_activity_panel() -> Panel:
+@functools.cache
+def _agent_label(name: str) -> str:
+    """Имя агента, выровненное по ширине колонки (набор имён мал — кешируем)."""
+    return f"[cyan]{name:8}[/cyan]"
+
+
+def create_activity_panel(snap: Snapshot) -> Panel:
     """Создаёт панель активности."""
-    events = get_recent_events(limit=15)
-    agents = {a.agent_id: a for a in get_all_agents()}
+    events = snap.events
+    agents = snap.agents_by_id
 
     if not events:
         return Panel(
@@ -271,38 +303,21 @@ def create_activity_panel() -> Panel:
     for event in events:
         # Время
         if event.timestamp:
-            time_str = event.timestamp.strftime("%H:%M:%S")
+            time_str = event.timestamp.time().isoformat("seconds")
         else:
             time_str = "--:--:--"
 
         # Агент
         agent = agents.get(event.agent_id) if event.agent_id else None
-        agent_name = agent.name if agent else "-"
-
-        # Событие
-        event_styles = {
-            "task_started": ("green", "▶"),
-            "task_done": ("blue", "✓"),
-            "file_locked": ("yellow", "🔒"),
-            "file_unlocked": ("yellow", "🔓"),
-            "waiting_for_lock": ("red", "⏳"),
-            "error": ("red", "✗"),
-            "agent_registered": ("cyan", "➕"),
-            "agent_started": ("green", "🚀"),
-        }
-
-        style, icon = event_styles.get(event.event.value, ("white", "•"))
+        agent_label = _agent_label(agent.name if agent else "-")
 
         # Номер задачи
         task_str = f"[magenta]#{event.task_id}[/magenta]" if event.task_id else "   "
 
         # Сообщение
-        msg = event.message or event.event.value
-        if len(msg) > 35:
-            msg = msg[:32] + "..."
+        msg = truncate(event.message or event.event.value, _ACTIVITY_MSG_MAX)
 
-        line = f"[dim]{time_str}[/dim] [{style}]{icon}[/{style}] {task_str} [cyan]{agent_name:8}[/cyan] {msg}"
-        lines.append(line)
+        lines.append(f"[dim]{time_str}[/dim] {_EVENT_ICONS[event.event]} {task_str} {agent_label} {msg}")
 
     return Panel(
         "\n".join(lines),
@@ -311,8 +326,10 @@ def create_activity_panel() -> Panel:
     )
 
 
-def create_dashboard(show_done: bool = False, full_desc: bool = False) -> Layout:
-    """Создаёт полный дашборд."""
+def create_layout() -> "Layout":
+    """Создаёт каркас дашборда: 4 именованные области, заполняемые update_dashboard."""
+    from rich.layout import Layout
+
     layout = Layout()
 
     # Верхняя часть: агенты и задачи
@@ -322,18 +339,33 @@ def create_dashboard(show_done: bool = False, full_desc: bool = False) -> Layout
     )
 
     layout["top"].split_row(
-        Layout(create_agents_panel(), name="agents"),
-        Layout(create_tasks_panel(show_done, full_desc), name="tasks"),
+        Layout(name="agents"),
+        Layout(name="tasks"),
     )
 
     layout["bottom"].split_row(
-        Layout(create_locks_panel(), name="locks"),
-        Layout(create_activity_panel(), name="activity"),
+        Layout(name="locks"),
+        Layout(name="activity"),
     )
 
     return layout
 
 
+def update_dashboard(layout: "Layout", snap: Snapshot, show_done: bool = False, full_desc: bool = False) -> None:
+    """Подменяет содержимое панелей готового каркаса по срезу БД."""
+    layout["agents"].update(create_agents_panel(snap))
+    layout["tasks"].update(create_tasks_panel(snap, show_done, full_desc))
+    layout["locks"].update(create_locks_panel(snap))
+    layout["activity"].update(create_activity_panel(snap))
+
+
+def create_dashboard(snap: Snapshot, show_done: bool = False, full_desc: bool = False) -> "Layout":
+    """Создаёт полный дашборд из одного среза БД."""
+    layout = create_layout()
+    update_dashboard(layout, snap, show_done, full_desc)
+    return layout
+
+
 def monitor_command(
     refresh: int = typer.Option(2, "--refresh", "-r", help="Интервал обновления в секундах"),
     full: bool = typer.Option(False, "--full", "-f", help="Показывать полное описание задач"),
@@ -351,17 +383,45 @@ def monitor_command(
 
     show_done = False
 
+    # Хвост лога копится между обновлениями: из БД читаются только новые события
+    events: deque[TaskLogEntry] = deque(maxlen=ACTIVITY_LIMIT)
+    last_log_id = 0
+
+    def next_snapshot() -> Snapshot:
+        nonlocal last_log_id
+        snap = snapshot(events_limit=ACTIVITY_LIMIT, since_log_id=last_log_id)
+        if snap.events:
+            last_log_id = snap.events[0].log_id
+            events.extendleft(reversed(snap.events))
+        snap.events = list(events)
+        return snap
+
     console.print("[dim]Запуск монитора... (Ctrl+C для выхода)[/dim]\n")
 
+    snap = next_snapshot()
+    prev_state = (snap.agents, snap.tasks, snap.locks, last_log_id)
+    interval = float(refresh)
+    max_interval = max(float(refresh), IDLE_REFRESH_MAX)
+
+    # Каркас строится один раз, на каждом тике меняются только панели
+    layout = create_dashboard(snap, show_done, full)
+
     try:
+        # Перерисовываем только по refresh(): фоновый авто-refresh Rich не нужен
         with Live(
-            create_dashboard(show_done, full),
+            layout,
             console=console,
-            refresh_per_second=1,
+            auto_refresh=False,
             screen=True,
         ) as live:
             while True:
-                time.sleep(refresh)
-                live.update(create_dashboard(show_done, full))
+                time.sleep(interval)
+                snap = next_snapshot()
+                state = (snap.agents, snap.tasks, snap.locks, last_log_id)
+                # Без изменений — реже опрашиваем БД, при изменении возвращаемся к refresh
+                interval = min(interval * 1.5, max_interval) if state == prev_state else float(refresh)
+                prev_state = state
+                update_dashboard(layout, snap, show_done, full)
+                live.refresh()
     except KeyboardInterrupt:
         console.print("\n[dim]Монитор остановлен[/dim]")
@@ -7,7 +7,7 @@
 
 import typer
 
-from ..db import get_all_agents, log_event
+from ..db import get_agent_by_name, get_agents_by_cli, get_all_agents, has_agents, log_events
 from ..models import EventType
 from ..utils import check_db as _check_db
 from ..utils import create_console
@@ -27,23 +27,22 @@ def start_command(
     """
     _check_db()
 
-    agents = get_all_agents()
-
-    if not agents:
+    if not has_agents():
         console.print("[yellow]Нет зарегистрированных агентов[/yellow]")
         console.print("Сначала зарегистрируйте агентов через [cyan]swarm join[/cyan]")
         return
 
-    # Фильтруем агентов
+    # Выбираем агентов запросом под конкретный фильтр
     if all_agents:
-        target_agents = agents
+        target_agents = get_all_agents()
     elif agent_name:
-        target_agents = [a for a in agents if a.name == agent_name]
-        if not target_agents:
+        agent = get_agent_by_name(agent_name)
+        if agent is None:
             console.print(f"[red]✗ Агент '{agent_name}' не найден[/red]")
             raise typer.Exit(1)
+        target_agents = [agent]
     elif cli_type:
-        target_agents = [a for a in agents if a.cli_type == cli_type]
+        target_agents = get_agents_by_cli(cli_type)
         if not target_agents:
             console.print(f"[red]✗ Агенты с типом CLI '{cli_type}' не найдены[/red]")
             raise typer.Exit(1)
@@ -51,13 +50,10 @@ def start_command(
         console.print("[red]✗ Укажите --all, --agent или --cli[/red]")
         raise typer.Exit(1)
 
-    # Логируем событие старта
-    for agent in target_agents:
-        log_event(
-            event=EventType.AGENT_STARTED,
-            agent_id=agent.agent_id,
-            message="Лидер дал команду начать работу",
-        )
+    # Логируем событие старта одной транзакцией
+    log_events(
+        [(EventType.AGENT_STARTED, None, agent.agent_id, "Лидер дал команду начать работу") for agent in target_agents]
+    )
 
     # Выводим список
     console.print(f"\n[green]✓ Команда старта отправлена ({len(target_agents)} агентов)[/green]\n")
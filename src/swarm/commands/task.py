@@ -15,6 +15,7 @@ from ..db import (
     get_all_tasks,
     get_current_agent,
     get_task,
+    get_task_status_counts,
     log_event,
     reset_task,
 )
@@ -134,31 +135,24 @@ def list_command(
             console.print(f"[red]✗ Неверный статус. Допустимые значения: {valid}[/red]")
             raise typer.Exit(1)
 
-    # Получаем все задачи один раз для статистики и отображения (m-6)
-    all_tasks = get_all_tasks()
-
-    # Применяем фильтры
-    tasks = all_tasks
-    if task_status:
-        tasks = [t for t in tasks if t.status == task_status]
-    if agent is not None:
-        tasks = [t for t in tasks if t.assigned_to == agent]
-    if priority is not None:
-        tasks = [t for t in tasks if t.priority == priority]
-
-    # Фильтруем завершённые если не указан --all
-    if not show_all and task_status is None:
-        tasks = [t for t in tasks if t.status != TaskStatus.DONE]
+    # Фильтры применяются в SQL; завершённые скрываем, если не указан --all
+    tasks = get_all_tasks(
+        status=task_status,
+        assigned_to=agent,
+        priority=priority,
+        exclude_done=not show_all and task_status is None,
+    )
 
     if not tasks:
         console.print("[yellow]Задач не найдено[/yellow]")
         return
 
-    # Считаем статистику
-    pending_count = len([t for t in all_tasks if t.status == TaskStatus.PENDING])
-    progress_count = len([t for t in all_tasks if t.status == TaskStatus.IN_PROGRESS])
-    done_count = len([t for t in all_tasks if t.status == TaskStatus.DONE])
-    blocked_count = len([t for t in all_tasks if t.status == TaskStatus.BLOCKED])
+    # Считаем статистику одним GROUP BY
+    counts = get_task_status_counts()
+    pending_count = counts.get(TaskStatus.PENDING, 0)
+    progress_count = counts.get(TaskStatus.IN_PROGRESS, 0)
+    done_count = counts.get(TaskStatus.DONE, 0)
+    blocked_count = counts.get(TaskStatus.BLOCKED, 0)
 
     # Заголовок со статистикой
     console.print()
@@ -9,7 +9,6 @@ from pathlib import Path
 
 import typer
 from rich.panel import Panel
-from rich.table import Table
 
 from ..db import (
     add_launch_session_agent,
@@ -20,6 +19,7 @@ from ..db import (
     get_launch_session_agents,
     get_launch_sessions,
     log_event,
+    log_events,
     reconcile_launch_session,
     update_launch_agent_status,
     update_launch_session_status,
@@ -48,6 +48,8 @@ app = typer.Typer(
 
 
 def _print_launch_plan(spec) -> None:
+    from rich.table import Table
+
     table = Table(title="План запуска терминальных агентов", show_header=True)
     table.add_column("#", width=3, style="cyan")
     table.add_column("CLI", width=10)
@@ -190,6 +192,8 @@ def launch_command(
     else:
         launch_results = {}
 
+    # События по агентам копим и пишем одной транзакцией после цикла
+    launch_events = []
     for agent in launchable_agents:
         result = launch_results.get(agent.name)
         if result and result.started:
@@ -199,17 +203,22 @@ def launch_command(
                 LaunchRegistrationStatus.LAUNCHED,
                 terminal_pid=result.pid,
             )
-            log_event(
-                EventType.LAUNCH_AGENT_STARTED,
-                message=f"{session_id}: агент {agent.name} ({agent.cli}) запущен",
+            launch_events.append(
+                (EventType.LAUNCH_AGENT_STARTED, None, None, f"{session_id}: агент {agent.name} ({agent.cli}) запущен")
             )
         else:
             update_launch_agent_status(session_id, agent.name, LaunchRegistrationStatus.FAILED)
             error_message = result.error if result else "неизвестная ошибка запуска"
-            log_event(
-                EventType.LAUNCH_AGENT_FAILED,
-                message=f"{session_id}: агент {agent.name} не запущен ({error_message})",
+            launch_events.append(
+                (
+                    EventType.LAUNCH_AGENT_FAILED,
+                    None,
+                    None,
+                    f"{session_id}: агент {agent.name} не запущен ({error_message})",
+                )
             )
+    if launch_events:
+        log_events(launch_events)
 
     started_count = sum(1 for result in launch_results.values() if result.started)
     total_launchable = len(launchable_agents)
@@ -273,6 +282,8 @@ def _print_excluded_command(spec, excluded_agents, original_spec_path: Path) ->
 @app.command("status", add_help_option=False)
 def status_command():
     """Показывает активные launch-сессии и состояние регистрации."""
+    from rich.table import Table
+
     _check_db()
     ensure_terminal_schema()
 
@@ -359,6 +370,8 @@ def reconcile_command(
     session_id: str = typer.Option(..., "--session", help="ID launch session"),
 ):
     """Сверяет launch session с фактически зарегистрированными агентами."""
+    from rich.table import Table
+
     _check_db()
     ensure_terminal_schema()
 
@@ -388,8 +401,11 @@ def reconcile_command(
     console.print(table)
     console.print(f"Итоговый статус session: [cyan]{session.status.value}[/cyan]")
 
+    reconcile_events = []
     if session.status == LaunchSessionStatus.REGISTERED:
-        log_event(EventType.LAUNCH_SESSION_COMPLETED, message=f"Launch session {session_id} полностью зарегистрирована")
+        reconcile_events.append(
+            (EventType.LAUNCH_SESSION_COMPLETED, None, None, f"Launch session {session_id} полностью зарегистрирована")
+        )
 
     for launch_agent in launch_agents:
         previous_status = before.get(launch_agent.agent_name)
@@ -398,8 +414,13 @@ def reconcile_command(
             and previous_status != LaunchRegistrationStatus.REGISTERED
         ):
             live_agent = get_agent_by_name(launch_agent.agent_name)
-            log_event(
-                EventType.LAUNCH_AGENT_REGISTERED,
-                agent_id=live_agent.agent_id if live_agent else None,
-                message=f"{session_id}: агент {launch_agent.agent_name} зарегистрирован",
+            reconcile_events.append(
+                (
+                    EventType.LAUNCH_AGENT_REGISTERED,
+                    None,
+                    live_agent.agent_id if live_agent else None,
+                    f"{session_id}: агент {launch_agent.agent_name} зарегистрирован",
+                )
             )
+    if reconcile_events:
+        log_events(reconcile_events)
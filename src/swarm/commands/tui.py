@@ -4,6 +4,7 @@ TUI-монитор SWARM на базе Textual.
 Презентабельный интерфейс с 6 вкладками и детальными панелями.
 """
 
+from collections import Counter
 from datetime import UTC, datetime
 
 from textual.app import App, ComposeResult
@@ -21,16 +22,9 @@ from textual.widgets import (
   TabPane,
 )
 
-from ..db import (
-  find_db_path,
-  get_all_agents,
-  get_all_locks,
-  get_all_tasks,
-  get_recent_events,
-  is_process_alive,
-)
+from ..db import find_db_path, is_process_alive, snapshot
 from ..models import Agent, AgentStatus, EventType, FileLock, Task, TaskLogEntry, TaskStatus
-from ..utils import create_console, get_version
+from ..utils import create_console, enum_markup, get_version, truncate, truncate_left
 
 from rich.markup import escape as _esc
 
@@ -67,6 +61,14 @@ EVENT_ICONS = {
 }
 
 
+# Готовые ячейки иконки и статуса — таблицы не собирают markup на каждом тике
+_AGENT_ICON_CELLS = enum_markup(AgentStatus, AGENT_STATUS_ICONS, ("?", "white"), "[{1}]{0}[/{1}]")
+_AGENT_STATUS_CELLS = enum_markup(AgentStatus, AGENT_STATUS_ICONS, ("?", "white"), "[{1}]{value}[/{1}]")
+_TASK_ICON_CELLS = enum_markup(TaskStatus, TASK_STATUS_ICONS, ("?", "white"), "[{1}]{0}[/{1}]")
+_TASK_STATUS_CELLS = enum_markup(TaskStatus, TASK_STATUS_ICONS, ("?", "white"), "[{1}]{value}[/{1}]")
+_EVENT_ICON_CELLS = enum_markup(EventType, EVENT_ICONS, ("•", "white"), "[{1}]{0}[/{1}]")
+
+
 # ── Вспомогательные функции ──────────────────────────────────────
 
 def _fmt_heartbeat(agent: Agent, now: datetime) -> str:
@@ -99,7 +101,8 @@ def _fmt_dt(dt: datetime | None) -> str:
   """Форматирует datetime для отображения."""
   if dt is None:
     return "—"
-  return dt.strftime("%Y-%m-%d %H:%M")
+  # isoformat заметно быстрее strftime: функция зовётся на каждую строку таблиц каждый тик
+  return dt.isoformat(" ", "minutes")
 
 
 def _progress_bar(done: int, total: int, width: int = 20) -> str:
@@ -125,10 +128,12 @@ class StatsBar(Static):
     locks: list[FileLock],
   ) -> None:
     working = sum(1 for a in agents if a.status == AgentStatus.WORKING)
-    done = sum(1 for t in tasks if t.status == TaskStatus.DONE)
+    # Один проход по задачам вместо отдельного на каждый счётчик
+    task_counts = Counter(t.status for t in tasks)
+    done = task_counts[TaskStatus.DONE]
     total = len(tasks)
-    blocked = sum(1 for t in tasks if t.status == TaskStatus.BLOCKED)
-    failed = sum(1 for t in tasks if t.status == TaskStatus.FAILED)
+    blocked = task_counts[TaskStatus.BLOCKED]
+    failed = task_counts[TaskStatus.FAILED]
 
     # Статус БД
     db_connected = find_db_path() is not None
@@ -168,13 +173,13 @@ class OverviewAgentsPanel(Static):
     cursor_row = table.cursor_row if table.row_count > 0 else 0
     table.clear()
     for a in agents:
-      icon, color = AGENT_STATUS_ICONS.get(a.status, ("?", "white"))
+      icon_cell, status_cell = _AGENT_ICON_CELLS[a.status], _AGENT_STATUS_CELLS[a.status]
       task = f"#{a.current_task_id}" if a.current_task_id else "—"
       table.add_row(
-        f"[{color}]{icon}[/{color}]",
+        icon_cell,
         a.name,
         a.role or "—",
-        f"[{color}]{a.status.value}[/{color}]",
+        status_cell,
         task,
       )
     if cursor_row < table.row_count:
@@ -199,15 +204,13 @@ class OverviewTasksPanel(Static):
     # Обзор показывает только активные задачи
     filtered = [t for t in tasks if t.status != TaskStatus.DONE]
     for t in filtered[:30]:
-      icon, color = TASK_STATUS_ICONS.get(t.status, ("?", "white"))
-      desc = t.description
-      if len(desc) > 28:
-        desc = desc[:25] + "..."
+      icon_cell, status_cell = _TASK_ICON_CELLS[t.status], _TASK_STATUS_CELLS[t.status]
+      desc = truncate(t.description, 28)
       table.add_row(
-        f"[{color}]{icon}[/{color}]",
+        icon_cell,
         f"[cyan]#{t.task_id}[/cyan]",
         str(t.priority),
-        f"[{color}]{t.status.value}[/{color}]",
+        status_cell,
         _esc(desc),
       )
     if cursor_row < table.row_count:
@@ -237,9 +240,7 @@ class OverviewLocksPanel(Static):
     for lock in locks:
       agent = agents_map.get(lock.locked_by)
       name = agent.name if agent else f"#{lock.locked_by}"
-      path = lock.file_path
-      if len(path) > 25:
-        path = "…" + path[-24:]
+      path = truncate_left(lock.file_path, 25, "…")
       mins = int((now - lock.locked_at).total_seconds() / 60) if lock.locked_at else 0
       time_str = _fmt_duration_mins(mins)
       if mins > 30:
@@ -263,16 +264,14 @@ class OverviewActivityPanel(Static):
   ) -> None:
     lines = []
     for e in events[:15]:
-      time_str = e.timestamp.strftime("%H:%M:%S") if e.timestamp else "--:--:--"
-      icon, color = EVENT_ICONS.get(e.event, ("•", "white"))
+      time_str = e.timestamp.time().isoformat("seconds") if e.timestamp else "--:--:--"
+      icon = _EVENT_ICON_CELLS[e.event]
       agent = agents_map.get(e.agent_id) if e.agent_id else None
       agent_name = agent.name if agent else "—"
       task_str = f"[magenta]#{e.task_id}[/magenta]" if e.task_id else "   "
-      msg = e.message or e.event.value
-      if len(msg) > 30:
-        msg = msg[:27] + "..."
+      msg = truncate(e.message or e.event.value, 30)
       lines.append(
-        f"[dim]{time_str}[/dim] [{color}]{icon}[/{color}] {task_str} "
+        f"[dim]{time_str}[/dim] {icon} {task_str} "
         f"[cyan]{agent_name:8}[/cyan] {_esc(msg)}"
       )
     log = self.query_one("#ov-activity-log", Static)
@@ -480,12 +479,13 @@ class SwarmTUI(App):
   # ── Обновление данных ────────────────────────────────────────
 
   def _refresh_all(self) -> None:
-    """Загружает данные из БД один раз и обновляет все виджеты."""
-    agents = get_all_agents()
-    tasks = get_all_tasks()
-    locks = get_all_locks()
-    events = get_recent_events(limit=100)
-    agents_map = {a.agent_id: a for a in agents}
+    """Загружает данные из БД одним срезом и обновляет все виджеты."""
+    snap = snapshot(events_limit=100)
+    agents = snap.agents
+    tasks = snap.tasks
+    locks = snap.locks
+    events = snap.events
+    agents_map = snap.agents_by_id
 
     # Кешируем для detail-панелей
     self._agents_data = agents
@@ -516,19 +516,19 @@ class SwarmTUI(App):
     now = datetime.now(UTC).replace(tzinfo=None)
 
     for a in agents:
-      icon, color = AGENT_STATUS_ICONS.get(a.status, ("?", "white"))
+      icon_cell, status_cell = _AGENT_ICON_CELLS[a.status], _AGENT_STATUS_CELLS[a.status]
       task = f"#{a.current_task_id}" if a.current_task_id else "—"
       pid = str(a.pid) if a.pid else "—"
       hb = _fmt_heartbeat(a, now)
       reg = _fmt_dt(a.registered_at)
 
       table.add_row(
-        f"[{color}]{icon}[/{color}]",
+        icon_cell,
         f"[bold]#{a.agent_id}[/bold]",
         f"[bold]{a.name}[/bold]",
         a.cli_type,
         a.role or "—",
-        f"[{color}]{a.status.value}[/{color}]",
+        status_cell,
         task,
         pid,
         hb,
@@ -552,7 +552,7 @@ class SwarmTUI(App):
     filtered = tasks if self.show_done else [t for t in tasks if t.status != TaskStatus.DONE]
 
     for t in filtered:
-      icon, color = TASK_STATUS_ICONS.get(t.status, ("?", "white"))
+      icon_cell, status_cell = _TASK_ICON_CELLS[t.status], _TASK_STATUS_CELLS[t.status]
       role = t.target_role or "—"
       assigned = t.target_name or "—"
       depends = f"#{t.depends_on}" if t.depends_on else "—"
@@ -564,10 +564,10 @@ class SwarmTUI(App):
         working = "—"
 
       table.add_row(
-        f"[{color}]{icon}[/{color}]",
+        icon_cell,
         f"[bold cyan]#{t.task_id}[/bold cyan]",
         str(t.priority),
-        f"[{color}]{t.status.value}[/{color}]",
+        status_cell,
         role,
         f"[cyan]{assigned}[/cyan]",
         f"[green]{working}[/green]",
@@ -590,7 +590,7 @@ class SwarmTUI(App):
     table.clear()
 
     for t in tasks:
-      icon, color = TASK_STATUS_ICONS.get(t.status, ("?", "white"))
+      icon_cell, status_cell = _TASK_ICON_CELLS[t.status], _TASK_STATUS_CELLS[t.status]
       role = t.target_role or "—"
       assigned = t.target_name or "—"
       depends = f"#{t.depends_on}" if t.depends_on else "—"
@@ -603,10 +603,10 @@ class SwarmTUI(App):
         working = "—"
 
       table.add_row(
-        f"[{color}]{icon}[/{color}]",
+        icon_cell,
         f"[bold cyan]#{t.task_id}[/bold cyan]",
         str(t.priority),
-        f"[{color}]{t.status.value}[/{color}]",
+        status_cell,
         role,
         f"[cyan]{assigned}[/cyan]",
         f"[green]{working}[/green]",
@@ -661,15 +661,15 @@ class SwarmTUI(App):
     """Обновляет полный лог активности (последние 100 записей из БД)."""
     lines = []
     for e in events:
-      time_str = e.timestamp.strftime("%H:%M:%S") if e.timestamp else "--:--:--"
-      icon, color = EVENT_ICONS.get(e.event, ("•", "white"))
+      time_str = e.timestamp.time().isoformat("seconds") if e.timestamp else "--:--:--"
+      icon = _EVENT_ICON_CELLS[e.event]
       agent = agents_map.get(e.agent_id) if e.agent_id else None
       agent_name = agent.name if agent else "—"
       task_str = f"[magenta]#{e.task_id:3}[/magenta]" if e.task_id else "     "
       msg = e.message or e.event.value
 
       lines.append(
-        f"[dim]{time_str}[/dim]  [{color}]{icon}[/{color}]  {task_str}  "
+        f"[dim]{time_str}[/dim]  {icon}  {task_str}  "
         f"[cyan]{agent_name:10}[/cyan]  {_esc(msg)}"
       )
 
@@ -8,12 +8,16 @@
 - Логирование событий
 """
 
+import atexit
 import contextlib
+import csv
+import functools
 import os
 import platform
 import re
 import sqlite3
 import subprocess
+import threading
 from collections.abc import Generator
 from contextlib import contextmanager
 from datetime import UTC, datetime, timedelta
@@ -28,6 +32,7 @@ from .models import (
     LaunchSession,
     LaunchSessionAgent,
     LaunchSessionStatus,
+    Snapshot,
     Task,
     TaskLogEntry,
     TaskStatus,
@@ -48,6 +53,8 @@ SESSIONS_DIR = Path(".swarm") / "sessions"
 # Регулярное выражение для валидации имени агента (m-9)
 AGENT_NAME_RE = re.compile(r"^[a-zA-Z0-9_-]{1,32}$")
 
+# INSERT ... RETURNING появился в SQLite 3.35; на старых сборках перечитываем строку SELECT-ом
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
 
 # SQL-схема базы данных
 SCHEMA_SQL = """
@@ -126,10 +133,19 @@ CREATE TABLE IF NOT EXISTS launch_session_agents (
 );
 
 CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks(status, priority);
-CREATE INDEX IF NOT EXISTS idx_tasks_assigned ON tasks(assigned_to);
-CREATE INDEX IF NOT EXISTS idx_file_locks_path ON file_locks(file_path);
-CREATE INDEX IF NOT EXISTS idx_task_log_task ON task_log(task_id);
+-- Незавершённые задачи в порядке выдачи (priority, task_id): done копятся бесконечно и в индекс не попадают
+CREATE INDEX IF NOT EXISTS idx_tasks_active ON tasks(priority) WHERE status != 'done';
+DROP INDEX IF EXISTS idx_tasks_assigned;
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_status ON tasks(assigned_to, status);
+-- file_path уже проиндексирован ограничением UNIQUE; отдельный индекс только дублировал запись
+DROP INDEX IF EXISTS idx_file_locks_path;
+CREATE INDEX IF NOT EXISTS idx_file_locks_task ON file_locks(task_id);
+CREATE INDEX IF NOT EXISTS idx_file_locks_agent ON file_locks(locked_by);
+CREATE INDEX IF NOT EXISTS idx_task_log_ts ON task_log(timestamp);
+CREATE INDEX IF NOT EXISTS idx_task_log_task_ts ON task_log(task_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_task_log_agent_ts ON task_log(agent_id, timestamp);
 CREATE INDEX IF NOT EXISTS idx_agents_session ON agents(session_token);
+CREATE INDEX IF NOT EXISTS idx_agents_cli ON agents(cli_type);
 CREATE INDEX IF NOT EXISTS idx_launch_sessions_status ON launch_sessions(status);
 CREATE INDEX IF NOT EXISTS idx_launch_agents_session ON launch_session_agents(session_id);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_launch_agents_session_name ON launch_session_agents(session_id, agent_name);
@@ -138,16 +154,39 @@ CREATE UNIQUE INDEX IF NOT EXISTS idx_launch_agents_session_name ON launch_sessi
 
 
 
+# Кеш найденных путей к БД: стартовая директория -> путь к swarm.db
+_DB_PATH_CACHE: dict[Path, Path] = {}
+
+
+def clear_db_path_cache() -> None:
+    """Сбрасывает кеш путей к БД (после init или удаления swarm.db)."""
+    _DB_PATH_CACHE.clear()
+
+
 def find_db_path(start_dir: Path | None = None) -> Path | None:
-    """Ищет файл swarm.db в текущей директории и родительских."""
-    current = start_dir or Path.cwd()
+    """Ищет файл swarm.db в текущей директории и родительских.
+
+    Найденный путь кешируется по стартовой директории: повторный вызов
+    проверяет один файл вместо обхода всех родителей. Отсутствие БД не
+    кешируется, чтобы `swarm init` сразу становился видимым.
+    """
+    start = start_dir or Path.cwd()
+    cached = _DB_PATH_CACHE.get(start)
+    if cached is not None:
+        if cached.exists():
+            return cached
+        del _DB_PATH_CACHE[start]
+
+    current = start
     while current != current.parent:
         db_path = current / DB_FILENAME
         if db_path.exists():
+            _DB_PATH_CACHE[start] = db_path
             return db_path
         current = current.parent
     db_path = current / DB_FILENAME
     if db_path.exists():
+        _DB_PATH_CACHE[start] = db_path
         return db_path
     return None
 
@@ -160,16 +199,75 @@ def get_db_path() -> Path:
     return db_path
 
 
+# Открытое соединение текущего потока: (путь к БД, inode файла, соединение).
+# Храним одно на поток — процессы SWARM работают с одной БД.
+_THREAD_STATE = threading.local()
+
+
+def _open_connection(path: Path) -> sqlite3.Connection:
+    """Открывает соединение с БД и применяет настройки."""
+    # timeout задаёт busy_timeout: конкурирующая запись ждёт COMMIT, а не падает сразу.
+    # Кеш подготовленных выражений ищет по тексту SQL; 256 хватает на все запросы модуля,
+    # включая варианты динамических фильтров, без вытеснения в долгоживущих TUI/monitor.
+    conn = sqlite3.connect(str(path), timeout=30.0, isolation_level=None, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    # В WAL режим NORMAL безопасен и убирает fsync на каждый COMMIT
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Временные таблицы сортировок и GROUP BY держим в памяти, а не во временных файлах
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def close_connections() -> None:
+    """Закрывает закешированное соединение текущего потока (перед удалением БД)."""
+    cached = getattr(_THREAD_STATE, "conn", None)
+    _THREAD_STATE.conn = None
+    if cached is not None:
+        cached[2].close()
+
+
+# Закрываем соединение явно: последний закрытый коннект делает checkpoint WAL
+atexit.register(close_connections)
+
+
 @contextmanager
 def get_connection(db_path: Path | None = None) -> Generator[sqlite3.Connection, None, None]:
-    """Контекстный менеджер для подключения к БД."""
+    """Контекстный менеджер для подключения к БД.
+
+    Соединение переиспользуется в пределах потока, пока файл БД тот же
+    (сверяется inode — пересозданная БД получит новое соединение).
+    """
     path = db_path or get_db_path()
-    conn = sqlite3.connect(str(path), timeout=30.0, isolation_level=None)
-    conn.row_factory = sqlite3.Row
+    inode = path.stat().st_ino
+    cached = getattr(_THREAD_STATE, "conn", None)
+    if cached is None or cached[0] != path or cached[1] != inode:
+        close_connections()
+        cached = (path, inode, _open_connection(path))
+        _THREAD_STATE.conn = cached
+        _THREAD_STATE.depth = 0
+
+    conn = cached[2]
+    _THREAD_STATE.depth += 1
     try:
         yield conn
     finally:
-        conn.close()
+        _THREAD_STATE.depth -= 1
+        # Незавершённая транзакция не должна достаться следующему вызову
+        if _THREAD_STATE.depth == 0 and conn.in_transaction:
+            conn.execute("ROLLBACK")
+
+
+@contextmanager
+def transaction() -> Generator[sqlite3.Connection, None, None]:
+    """Объединяет несколько записей в одну транзакцию BEGIN IMMEDIATE ... COMMIT."""
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
 
 
 def init_database(target_dir: Path | None = None) -> Path:
@@ -183,6 +281,8 @@ def init_database(target_dir: Path | None = None) -> Path:
         conn.commit()
     finally:
         conn.close()
+    # Новая БД может оказаться ближе, чем закешированная в родителе
+    clear_db_path_cache()
     return db_path
 
 
@@ -221,20 +321,23 @@ def register_agent(session_token: str, cli_type: str, name: str, role: str, pid:
                 conn.execute("ROLLBACK")
                 raise sqlite3.IntegrityError(f"Агент с именем '{name}' уже зарегистрирован")
 
-            cursor = conn.execute(
-                "INSERT INTO agents (session_token, cli_type, name, role, pid) VALUES (?, ?, ?, ?, ?)",
-                (session_token, cli_type, name, role, pid),
-            )
-            agent_id = cursor.lastrowid
-
-            conn.execute(
-                "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)",
-                (None, agent_id, EventType.AGENT_REGISTERED.value, f"Агент {name} ({cli_type}/{role}) зарегистрирован"),
+            insert_sql = "INSERT INTO agents (session_token, cli_type, name, role, pid) VALUES (?, ?, ?, ?, ?)"
+            params = (session_token, cli_type, name, role, pid)
+            if _HAS_RETURNING:
+                row = conn.execute(insert_sql + " RETURNING *", params).fetchone()
+            else:
+                cursor = conn.execute(insert_sql, params)
+                row = conn.execute("SELECT * FROM agents WHERE agent_id = ?", (cursor.lastrowid,)).fetchone()
+            agent_id = row["agent_id"]
+
+            log_event(
+                EventType.AGENT_REGISTERED,
+                agent_id=agent_id,
+                message=f"Агент {name} ({cli_type}/{role}) зарегистрирован",
+                conn=conn,
             )
 
             conn.execute("COMMIT")
-
-            row = conn.execute("SELECT * FROM agents WHERE agent_id = ?", (agent_id,)).fetchone()
             return Agent.from_row(row)
 
         except Exception:
@@ -243,22 +346,34 @@ def register_agent(session_token: str, cli_type: str, name: str, role: str, pid:
             raise
 
 
-def get_agent_by_session(session_token: str) -> Agent | None:
-    """Получает агента по токену сессии."""
+def _get_agent_by(column: str, value: str | int) -> Agent | None:
+    """Возвращает агента по agent_id/session_token/name."""
     with get_connection() as conn:
-        row = conn.execute("SELECT * FROM agents WHERE session_token = ?", (session_token,)).fetchone()
+        row = conn.execute(f"SELECT * FROM agents WHERE {column} = ?", (value,)).fetchone()
         if row:
             return Agent.from_row(row)
         return None
 
 
+def get_agent_by_id(agent_id: int) -> Agent | None:
+    """Получает агента по ID."""
+    return _get_agent_by("agent_id", agent_id)
+
+
+def get_agent_by_session(session_token: str) -> Agent | None:
+    """Получает агента по токену сессии."""
+    return _get_agent_by("session_token", session_token)
+
+
 def get_agent_by_name(name: str) -> Agent | None:
     """Получает агента по имени."""
+    return _get_agent_by("name", name)
+
+
+def has_agents() -> bool:
+    """Проверяет, зарегистрирован ли хотя бы один агент."""
     with get_connection() as conn:
-        row = conn.execute("SELECT * FROM agents WHERE name = ?", (name,)).fetchone()
-        if row:
-            return Agent.from_row(row)
-        return None
+        return conn.execute("SELECT EXISTS(SELECT 1 FROM agents)").fetchone()[0] == 1
 
 
 def get_all_agents() -> list[Agent]:
@@ -268,19 +383,37 @@ def get_all_agents() -> list[Agent]:
         return [Agent.from_row(row) for row in rows]
 
 
-def update_agent_heartbeat(agent_id: int) -> None:
-    """Обновляет heartbeat агента."""
+def get_agents_by_cli(cli_type: str) -> list[Agent]:
+    """Возвращает агентов указанного типа CLI."""
     with get_connection() as conn:
-        conn.execute("UPDATE agents SET last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ?", (agent_id,))
+        rows = conn.execute("SELECT * FROM agents WHERE cli_type = ? ORDER BY agent_id", (cli_type,)).fetchall()
+        return [Agent.from_row(row) for row in rows]
 
 
-def update_agent_status(agent_id: int, status: AgentStatus, task_id: int | None = None) -> None:
+def update_agent_heartbeat(agent_id: int, conn: sqlite3.Connection | None = None) -> None:
+    """Обновляет heartbeat агента."""
+    sql = "UPDATE agents SET last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ?"
+    if conn is not None:
+        conn.execute(sql, (agent_id,))
+    else:
+        with get_connection() as new_conn:
+            new_conn.execute(sql, (agent_id,))
+
+
+def update_agent_status(
+    agent_id: int,
+    status: AgentStatus,
+    task_id: int | None = None,
+    conn: sqlite3.Connection | None = None,
+) -> None:
     """Обновляет статус агента."""
-    with get_connection() as conn:
-        conn.execute(
-            "UPDATE agents SET status = ?, current_task_id = ?, last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ?",
-            (status.value, task_id, agent_id),
-        )
+    sql = "UPDATE agents SET status = ?, current_task_id = ?, last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ?"
+    params = (status.value, task_id, agent_id)
+    if conn is not None:
+        conn.execute(sql, params)
+    else:
+        with get_connection() as new_conn:
+            new_conn.execute(sql, params)
 
 
 def is_process_alive(pid: int | None) -> bool:
@@ -312,6 +445,27 @@ def is_process_alive(pid: int | None) -> bool:
         return False
 
 
+def alive_pids(pids: set[int]) -> set[int]:
+    """Возвращает живые PID из набора.
+
+    На Windows один вызов tasklist со списком всех процессов вместо запуска
+    tasklist на каждый PID; на остальных ОС os.kill(pid, 0) и так дешёвый.
+    """
+    if platform.system() == "Windows" and len(pids) > 1:
+        try:
+            result = subprocess.run(["tasklist", "/FO", "CSV", "/NH"], capture_output=True, timeout=10)
+            running = set()
+            # Имя образа может быть не в ASCII (cp866), PID во втором поле — всегда цифры
+            for fields in csv.reader(result.stdout.decode("latin-1").splitlines()):
+                if len(fields) > 1 and fields[1].isdigit():
+                    running.add(int(fields[1]))
+            if result.returncode == 0 and running:
+                return pids & running
+        except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+            pass
+    return {pid for pid in pids if is_process_alive(pid)}
+
+
 def cleanup_dead_agents(timeout_minutes: int = 30, check_pid: bool = True, force_all: bool = False) -> int:
     """Удаляет неактивных агентов. M-1: освобождает задачи/блокировки. m-4: UTC.
 
@@ -319,6 +473,18 @@ def cleanup_dead_agents(timeout_minutes: int = 30, check_pid: bool = True, force
     ВАЖ-6: все операции обёрнуты в BEGIN IMMEDIATE для атомарности.
     """
     with get_connection() as conn:
+        # PID проверяем до BEGIN IMMEDIATE: tasklist на Windows не должен держать блокировку записи.
+        # Каждый PID проверяется один раз; удаляем по agent_id, снятым вместе с PID, —
+        # агент, зарегистрированный позже с тем же (переиспользованным) PID, не пострадает.
+        dead_agent_ids: list[int] = []
+        if check_pid and not force_all:
+            pid_by_agent = {
+                row["agent_id"]: row["pid"]
+                for row in conn.execute("SELECT agent_id, pid FROM agents WHERE pid IS NOT NULL")
+            }
+            alive = alive_pids(set(pid_by_agent.values()))
+            dead_agent_ids = [agent_id for agent_id, pid in pid_by_agent.items() if pid not in alive]
+
         conn.execute("BEGIN IMMEDIATE")
         try:
             if force_all:
@@ -329,37 +495,36 @@ def cleanup_dead_agents(timeout_minutes: int = 30, check_pid: bool = True, force
                 conn.execute("COMMIT")
                 return cursor.rowcount
 
-            now = datetime.now(UTC).replace(tzinfo=None)
-            heartbeat_deadline = now - timedelta(minutes=timeout_minutes)
-
-            rows = conn.execute("SELECT agent_id, last_heartbeat, pid FROM agents").fetchall()
-            removable_agent_ids = []
-
-            for row in rows:
-                agent_id = row["agent_id"]
-                last_heartbeat = row["last_heartbeat"]
-                pid = row["pid"]
-                heartbeat_dt = datetime.fromisoformat(last_heartbeat) if isinstance(last_heartbeat, str) else last_heartbeat
-                heartbeat_stale = heartbeat_dt < heartbeat_deadline
-                pid_alive = is_process_alive(pid) if check_pid and pid is not None else None
-
-                if pid_alive is False:
-                    removable_agent_ids.append(agent_id)
-                    continue
-                if heartbeat_stale and (not check_pid or pid is None):
-                    removable_agent_ids.append(agent_id)
-
-            for agent_id in removable_agent_ids:
+            # Отбор целиком в SQL: мёртвый PID либо просроченный heartbeat, когда PID нечем проверить.
+            # Формат last_heartbeat (CURRENT_TIMESTAMP, UTC) совпадает с datetime('now', ...).
+            where = "last_heartbeat < datetime('now', ?)"
+            if check_pid:
+                where = f"({where} AND pid IS NULL)"
+            params: list = [f"-{timeout_minutes} minutes"]
+            if dead_agent_ids:
+                where += f" OR agent_id IN ({', '.join('?' * len(dead_agent_ids))})"
+                params.extend(dead_agent_ids)
+            removable_agent_ids = [
+                row["agent_id"] for row in conn.execute(f"SELECT agent_id FROM agents WHERE {where}", params)
+            ]
+
+            if removable_agent_ids:
+                # Одна инструкция на таблицу вместо отдельных запросов на каждого агента
+                placeholders = ", ".join("?" * len(removable_agent_ids))
                 conn.execute(
-                    "UPDATE tasks SET status = 'failed', assigned_to = NULL WHERE assigned_to = ? AND status = 'in_progress'",
-                    (agent_id,),
+                    "UPDATE tasks SET status = 'failed', assigned_to = NULL "
+                    f"WHERE assigned_to IN ({placeholders}) AND status = 'in_progress'",
+                    removable_agent_ids,
                 )
-                conn.execute("DELETE FROM file_locks WHERE locked_by = ?", (agent_id,))
-                conn.execute(
-                    "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)",
-                    (None, agent_id, EventType.AGENT_CLEANUP.value, f"Агент #{agent_id} удалён (неактивен)"),
+                conn.execute(f"DELETE FROM file_locks WHERE locked_by IN ({placeholders})", removable_agent_ids)
+                log_events(
+                    [
+                        (EventType.AGENT_CLEANUP, None, agent_id, f"Агент #{agent_id} удалён (неактивен)")
+                        for agent_id in removable_agent_ids
+                    ],
+                    conn=conn,
                 )
-                conn.execute("DELETE FROM agents WHERE agent_id = ?", (agent_id,))
+                conn.execute(f"DELETE FROM agents WHERE agent_id IN ({placeholders})", removable_agent_ids)
 
             conn.execute("COMMIT")
             return len(removable_agent_ids)
@@ -390,6 +555,12 @@ def _has_dependency_cycle(conn: sqlite3.Connection, depends_on: int) -> bool:
     return False
 
 
+_TASK_INSERT_SQL = (
+    "INSERT INTO tasks (description, priority, target_cli, target_name, target_role, depends_on)"
+    " VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
 def create_task(
     description: str,
     priority: int = 3,
@@ -409,15 +580,14 @@ def create_task(
                 conn.execute("ROLLBACK")
                 raise ValueError(f"Обнаружен цикл в зависимостях: задача {depends_on} участвует в циклической цепочке")
 
-            cursor = conn.execute(
-                "INSERT INTO tasks (description, priority, target_cli, target_name, target_role, depends_on) VALUES (?, ?, ?, ?, ?, ?)",
-                (description, priority, target_cli, target_name, target_role, depends_on),
-            )
-            task_id = cursor.lastrowid
+            params = (description, priority, target_cli, target_name, target_role, depends_on)
+            if _HAS_RETURNING:
+                row = conn.execute(_TASK_INSERT_SQL + " RETURNING *", params).fetchone()
+            else:
+                cursor = conn.execute(_TASK_INSERT_SQL, params)
+                row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (cursor.lastrowid,)).fetchone()
 
             conn.execute("COMMIT")
-
-            row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
             return Task.from_row(row)
 
         except ValueError:
@@ -429,6 +599,26 @@ def create_task(
             raise
 
 
+def create_tasks_bulk(
+    rows: list[tuple[str, int, str | None, str | None, str | None, int | None]],
+) -> list[int]:
+    """Создаёт пачку задач одной транзакцией, возвращает их ID по порядку.
+
+    Строка — (description, priority, target_cli, target_name, target_role, depends_on).
+    Зависимости проверяются на циклы так же, как в create_task; при ошибке не создаётся ни одна задача.
+    """
+    if not rows:
+        return []
+    with transaction() as conn:
+        for depends_on in {row[5] for row in rows if row[5] is not None}:
+            if _has_dependency_cycle(conn, depends_on):
+                raise ValueError(f"Обнаружен цикл в зависимостях: задача {depends_on} участвует в циклической цепочке")
+        conn.executemany(_TASK_INSERT_SQL, rows)
+        # Под BEGIN IMMEDIATE никто не вставляет между строками: ID идут подряд до last_insert_rowid()
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+
 def get_task(task_id: int) -> Task | None:
     """Получает задачу по ID."""
     with get_connection() as conn:
@@ -442,6 +632,7 @@ def get_all_tasks(
     status: TaskStatus | None = None,
     assigned_to: int | None = None,
     priority: int | None = None,
+    exclude_done: bool = False,
 ) -> list[Task]:
     """Возвращает список задач с опциональной фильтрацией."""
     query = "SELECT * FROM tasks WHERE 1=1"
@@ -449,6 +640,9 @@ def get_all_tasks(
     if status:
         query += " AND status = ?"
         params.append(status.value)
+    if exclude_done:
+        query += " AND status != ?"
+        params.append(TaskStatus.DONE.value)
     if assigned_to is not None:
         query += " AND assigned_to = ?"
         params.append(assigned_to)
@@ -458,71 +652,86 @@ def get_all_tasks(
     query += " ORDER BY priority ASC, task_id ASC"
 
     with get_connection() as conn:
-        rows = conn.execute(query, params).fetchall()
-        return [Task.from_row(row) for row in rows]
+        return [Task.from_row(row) for row in conn.execute(query, params)]
+
+
+def get_task_status_counts() -> dict[str, int]:
+    """Возвращает число задач по статусам: {'pending': 3, ...} (ключи сравнимы с TaskStatus)."""
+    with get_connection() as conn:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
 
 
 def assign_task_to_agent(task_id: int, agent_name: str) -> bool:
-    """Назначает задачу конкретному агенту (устанавливает target_name)."""
+    """Назначает задачу конкретному агенту (устанавливает target_name).
+
+    Проверка статуса входит в UPDATE: взятую в работу или завершённую задачу не переназначаем.
+    """
     with get_connection() as conn:
-        conn.execute("BEGIN IMMEDIATE")
-        try:
-            row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
-            if row is None:
-                conn.execute("ROLLBACK")
-                return False
-            task = Task.from_row(row)
-            if task.status in (TaskStatus.IN_PROGRESS, TaskStatus.DONE):
-                conn.execute("ROLLBACK")
-                return False
-            conn.execute("UPDATE tasks SET target_name = ? WHERE task_id = ?", (agent_name, task_id))
-            conn.execute("COMMIT")
-            return True
-        except Exception:
-            conn.execute("ROLLBACK")
-            raise
+        cursor = conn.execute(
+            "UPDATE tasks SET target_name = ? WHERE task_id = ? AND status NOT IN ('in_progress', 'done')",
+            (agent_name, task_id),
+        )
+        return cursor.rowcount == 1
+
+
+# Следующая задача для агента (параметры: role, name, cli_type).
+# Зависимость проверяется поиском по первичному ключу для каждого кандидата,
+# а не выборкой всех done-задач: их число растёт без ограничений.
+_CLAIM_CANDIDATE_SQL = """
+    SELECT task_id FROM tasks AS t
+    WHERE status = 'pending'
+      AND (
+        depends_on IS NULL
+        OR EXISTS (SELECT 1 FROM tasks AS d WHERE d.task_id = t.depends_on AND d.status = 'done')
+      )
+      AND (target_role IS NULL OR target_role = ?)
+      AND (target_name IS NULL OR target_name = ?)
+      AND (target_cli  IS NULL OR target_cli  = ?)
+    ORDER BY priority ASC, task_id ASC LIMIT 1
+"""
 
 
 def claim_next_task(agent: Agent) -> Task | None:
-    """Атомарно захватывает следующую подходящую задачу для агента."""
+    """Атомарно захватывает следующую подходящую задачу для агента.
+
+    Heartbeat агента обновляется в той же транзакции — и при захвате, и когда задач нет.
+    """
+    candidate_params = (agent.role, agent.name, agent.cli_type)
     with get_connection() as conn:
         conn.execute("BEGIN IMMEDIATE")
         try:
-            row = conn.execute(
-                """
-        SELECT task_id FROM tasks
-        WHERE status = 'pending'
-          AND (depends_on IS NULL OR depends_on IN (SELECT task_id FROM tasks WHERE status = 'done'))
-          AND (target_role IS NULL OR target_role = ?)
-          AND (target_name IS NULL OR target_name = ?)
-          AND (target_cli  IS NULL OR target_cli  = ?)
-        ORDER BY priority ASC, task_id ASC LIMIT 1
-        """,
-                (agent.role, agent.name, agent.cli_type),
-            ).fetchone()
+            if _HAS_RETURNING:
+                # Выбор кандидата, захват и чтение строки — одна инструкция
+                task_row = conn.execute(
+                    "UPDATE tasks SET status = 'in_progress', assigned_to = ?, started_at = CURRENT_TIMESTAMP "
+                    f"WHERE task_id = ({_CLAIM_CANDIDATE_SQL}) RETURNING *",
+                    (agent.agent_id, *candidate_params),
+                ).fetchone()
+            else:
+                row = conn.execute(_CLAIM_CANDIDATE_SQL, candidate_params).fetchone()
+                task_row = None
+                if row is not None:
+                    conn.execute(
+                        "UPDATE tasks SET status = 'in_progress', assigned_to = ?, started_at = CURRENT_TIMESTAMP WHERE task_id = ?",
+                        (agent.agent_id, row["task_id"]),
+                    )
+                    task_row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (row["task_id"],)).fetchone()
 
-            if row is None:
-                conn.execute("ROLLBACK")
+            if task_row is None:
+                conn.execute("UPDATE agents SET last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ?", (agent.agent_id,))
+                conn.execute("COMMIT")
                 return None
 
-            task_id = row["task_id"]
+            task_id = task_row["task_id"]
 
-            conn.execute(
-                "UPDATE tasks SET status = 'in_progress', assigned_to = ?, started_at = CURRENT_TIMESTAMP WHERE task_id = ?",
-                (agent.agent_id, task_id),
-            )
             conn.execute(
                 "UPDATE agents SET status = 'working', current_task_id = ?, last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ?",
                 (task_id, agent.agent_id),
             )
-            conn.execute(
-                "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)",
-                (task_id, agent.agent_id, EventType.TASK_STARTED.value, "Задача начата"),
-            )
+            log_event(EventType.TASK_STARTED, task_id, agent.agent_id, "Задача начата", conn=conn)
 
             conn.execute("COMMIT")
-
-            task_row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
             return Task.from_row(task_row)
 
         except Exception:
@@ -535,13 +744,11 @@ def complete_task(agent: Agent, summary: str) -> bool:
     with get_connection() as conn:
         conn.execute("BEGIN IMMEDIATE")
         try:
-            agent_row = conn.execute("SELECT * FROM agents WHERE agent_id = ?", (agent.agent_id,)).fetchone()
-            if agent_row is None:
-                conn.execute("ROLLBACK")
-                return False
-
-            fresh_agent = Agent.from_row(agent_row)
-            task_id = fresh_agent.current_task_id
+            # Нужен только current_task_id — полную модель агента не строим
+            agent_row = conn.execute(
+                "SELECT current_task_id FROM agents WHERE agent_id = ?", (agent.agent_id,)
+            ).fetchone()
+            task_id = agent_row["current_task_id"] if agent_row is not None else None
             if task_id is None:
                 conn.execute("ROLLBACK")
                 return False
@@ -550,15 +757,12 @@ def complete_task(agent: Agent, summary: str) -> bool:
                 "UPDATE tasks SET status = 'done', summary = ?, completed_at = CURRENT_TIMESTAMP WHERE task_id = ?",
                 (summary, task_id),
             )
-            conn.execute("DELETE FROM file_locks WHERE task_id = ? AND locked_by = ?", (task_id, fresh_agent.agent_id))
+            conn.execute("DELETE FROM file_locks WHERE task_id = ? AND locked_by = ?", (task_id, agent.agent_id))
             conn.execute(
                 "UPDATE agents SET status = 'idle', current_task_id = NULL, last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ?",
-                (fresh_agent.agent_id,),
-            )
-            conn.execute(
-                "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)",
-                (task_id, fresh_agent.agent_id, EventType.TASK_DONE.value, summary),
+                (agent.agent_id,),
             )
+            log_event(EventType.TASK_DONE, task_id, agent.agent_id, summary, conn=conn)
 
             conn.execute("COMMIT")
             return True
@@ -573,21 +777,21 @@ def reset_task(task_id: int) -> bool:
     with get_connection() as conn:
         conn.execute("BEGIN IMMEDIATE")
         try:
-            task_row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            task_row = conn.execute("SELECT status, assigned_to FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
             if task_row is None:
                 conn.execute("ROLLBACK")
                 return False
 
-            task = Task.from_row(task_row)
-            if task.status == TaskStatus.PENDING:
+            if task_row["status"] == TaskStatus.PENDING:
                 conn.execute("ROLLBACK")
                 return True
 
+            assigned_to = task_row["assigned_to"]
             # Освобождаем агента, если задача была назначена
-            if task.assigned_to:
+            if assigned_to:
                 conn.execute(
                     "UPDATE agents SET status = 'idle', current_task_id = NULL, last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ? AND current_task_id = ?",
-                    (task.assigned_to, task_id),
+                    (assigned_to, task_id),
                 )
 
             # Снимаем блокировки файлов
@@ -599,10 +803,7 @@ def reset_task(task_id: int) -> bool:
                 (task_id,),
             )
 
-            conn.execute(
-                "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)",
-                (task_id, task.assigned_to, EventType.TASK_RESET.value, "Задача сброшена в pending"),
-            )
+            log_event(EventType.TASK_RESET, task_id, assigned_to, "Задача сброшена в pending", conn=conn)
 
             conn.execute("COMMIT")
             return True
@@ -617,33 +818,36 @@ def force_close_task(task_id: int, reason: str = "Принудительно з
     with get_connection() as conn:
         conn.execute("BEGIN IMMEDIATE")
         try:
-            task_row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
-            if task_row is None:
-                conn.execute("ROLLBACK")
-                return False
+            close_sql = (
+                "UPDATE tasks SET status = 'done', summary = ?, completed_at = CURRENT_TIMESTAMP "
+                "WHERE task_id = ? AND status != 'done'"
+            )
+            if _HAS_RETURNING:
+                row = conn.execute(close_sql + " RETURNING assigned_to", (reason, task_id)).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT assigned_to FROM tasks WHERE task_id = ? AND status != 'done'", (task_id,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(close_sql, (reason, task_id))
 
-            task = Task.from_row(task_row)
-            if task.status == TaskStatus.DONE:
+            if row is None:
+                # Задачи нет — ошибка; уже завершена — закрывать нечего, это успех
+                exists = conn.execute("SELECT 1 FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
                 conn.execute("ROLLBACK")
-                return True
+                return exists is not None
 
-            conn.execute(
-                "UPDATE tasks SET status = 'done', summary = ?, completed_at = CURRENT_TIMESTAMP WHERE task_id = ?",
-                (reason, task_id),
-            )
+            assigned_to = row["assigned_to"]
             conn.execute("DELETE FROM file_locks WHERE task_id = ?", (task_id,))
 
-            if task.assigned_to:
+            if assigned_to:
                 conn.execute(
                     "UPDATE agents SET status = 'idle', current_task_id = NULL, last_heartbeat = CURRENT_TIMESTAMP WHERE agent_id = ? AND current_task_id = ?",
-                    (task.assigned_to, task_id),
+                    (assigned_to, task_id),
                 )
 
             # КРИТ-5: логируем TASK_FORCE_CLOSED (не TASK_DONE) — принудительное закрытие
-            conn.execute(
-                "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)",
-                (task_id, task.assigned_to, EventType.TASK_FORCE_CLOSED.value, reason),
-            )
+            log_event(EventType.TASK_FORCE_CLOSED, task_id, assigned_to, reason, conn=conn)
 
             conn.execute("COMMIT")
             return True
@@ -658,37 +862,39 @@ def force_close_task(task_id: int, reason: str = "Принудительно з
 # ============================================================
 
 
+@functools.lru_cache(maxsize=4096)
+def _normalize_path(file_path: str) -> str:
+    """Приводит путь к POSIX-виду (агенты блокируют одни и те же файлы)."""
+    return Path(file_path).as_posix()
+
+
 def try_lock_file(agent_id: int, task_id: int, file_path: str) -> bool:
     """Пытается захватить блокировку. C-1: BEGIN IMMEDIATE для атомарности."""
-    normalized_path = str(Path(file_path).as_posix())
+    normalized_path = _normalize_path(file_path)
 
     with get_connection() as conn:
         conn.execute("BEGIN IMMEDIATE")
         try:
-            existing_path_lock = conn.execute(
-                "SELECT locked_by FROM file_locks WHERE file_path = ?", (normalized_path,)
-            ).fetchone()
-
-            if existing_path_lock is not None:
-                conn.execute("ROLLBACK")
-                return existing_path_lock["locked_by"] == agent_id
-
+            # Агент держит не больше одной блокировки: повторный lock того же файла — успех, другого — отказ
             existing_agent_lock = conn.execute(
                 "SELECT file_path FROM file_locks WHERE locked_by = ?", (agent_id,)
             ).fetchone()
 
             if existing_agent_lock is not None:
                 conn.execute("ROLLBACK")
-                return False
+                return existing_agent_lock["file_path"] == normalized_path
 
-            conn.execute(
-                "INSERT INTO file_locks (file_path, locked_by, task_id) VALUES (?, ?, ?)",
+            # Файл занят другим агентом — конфликт по UNIQUE(file_path) без исключения
+            cursor = conn.execute(
+                "INSERT INTO file_locks (file_path, locked_by, task_id) VALUES (?, ?, ?) "
+                "ON CONFLICT(file_path) DO NOTHING",
                 (normalized_path, agent_id, task_id),
             )
-            conn.execute(
-                "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)",
-                (task_id, agent_id, EventType.FILE_LOCKED.value, f"Заблокирован файл: {file_path}"),
-            )
+            if cursor.rowcount == 0:
+                conn.execute("ROLLBACK")
+                return False
+
+            log_event(EventType.FILE_LOCKED, task_id, agent_id, f"Заблокирован файл: {file_path}", conn=conn)
 
             conn.execute("COMMIT")
             return True
@@ -703,7 +909,7 @@ def try_lock_file(agent_id: int, task_id: int, file_path: str) -> bool:
 
 def get_file_lock(file_path: str) -> FileLock | None:
     """Получает информацию о блокировке файла."""
-    normalized_path = str(Path(file_path).as_posix())
+    normalized_path = _normalize_path(file_path)
     with get_connection() as conn:
         row = conn.execute("SELECT * FROM file_locks WHERE file_path = ?", (normalized_path,)).fetchone()
         if row:
@@ -729,17 +935,22 @@ def get_agent_lock(agent_id: int) -> FileLock | None:
         return None
 
 
-def unlock_file(file_path: str, agent_id: int | None = None, force: bool = False) -> bool:
+def unlock_file(
+    file_path: str,
+    agent_id: int | None = None,
+    force: bool = False,
+    conn: sqlite3.Connection | None = None,
+) -> bool:
     """Снимает блокировку с файла."""
-    normalized_path = str(Path(file_path).as_posix())
-    with get_connection() as conn:
-        if force:
-            cursor = conn.execute("DELETE FROM file_locks WHERE file_path = ?", (normalized_path,))
-        else:
-            cursor = conn.execute(
-                "DELETE FROM file_locks WHERE file_path = ? AND locked_by = ?", (normalized_path, agent_id)
-            )
-        return cursor.rowcount > 0
+    normalized_path = _normalize_path(file_path)
+    if force:
+        sql, params = "DELETE FROM file_locks WHERE file_path = ?", (normalized_path,)
+    else:
+        sql, params = "DELETE FROM file_locks WHERE file_path = ? AND locked_by = ?", (normalized_path, agent_id)
+    if conn is not None:
+        return conn.execute(sql, params).rowcount > 0
+    with get_connection() as new_conn:
+        return new_conn.execute(sql, params).rowcount > 0
 
 
 def unlock_task_files(task_id: int) -> int:
@@ -974,6 +1185,9 @@ def reconcile_launch_session(session_id: str) -> tuple[LaunchSession | None, lis
 # ============================================================
 
 
+_LOG_INSERT_SQL = "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)"
+
+
 def log_event(
     event: EventType,
     task_id: int | None = None,
@@ -981,14 +1195,29 @@ def log_event(
     message: str | None = None,
     conn: sqlite3.Connection | None = None,
 ) -> None:
-    """Записывает событие в лог."""
-    sql = "INSERT INTO task_log (task_id, agent_id, event, message) VALUES (?, ?, ?, ?)"
+    """Записывает событие в лог.
+
+    С conn запись идёт в транзакцию вызывающего (без COMMIT), иначе — отдельной записью в autocommit.
+    """
     params = (task_id, agent_id, event.value, message)
     if conn is not None:
-        conn.execute(sql, params)
+        conn.execute(_LOG_INSERT_SQL, params)
     else:
         with get_connection() as new_conn:
-            new_conn.execute(sql, params)
+            new_conn.execute(_LOG_INSERT_SQL, params)
+
+
+def log_events(
+    events: list[tuple[EventType, int | None, int | None, str | None]],
+    conn: sqlite3.Connection | None = None,
+) -> None:
+    """Записывает пачку событий (event, task_id, agent_id, message) одним executemany."""
+    params = [(task_id, agent_id, event.value, message) for event, task_id, agent_id, message in events]
+    if conn is not None:
+        conn.executemany(_LOG_INSERT_SQL, params)
+    else:
+        with transaction() as new_conn:
+            new_conn.executemany(_LOG_INSERT_SQL, params)
 
 
 def get_recent_events(
@@ -1014,8 +1243,38 @@ def get_recent_events(
     params.append(limit)
 
     with get_connection() as conn:
-        rows = conn.execute(query, params).fetchall()
-        return [TaskLogEntry.from_row(row) for row in rows]
+        return [TaskLogEntry.from_row(row) for row in conn.execute(query, params)]
+
+
+def snapshot(events_limit: int = 15, since_log_id: int | None = None) -> Snapshot:
+    """Читает агентов, задачи, блокировки и последние события одной транзакцией.
+
+    С since_log_id возвращаются только события новее этого log_id —
+    дашборд дочитывает хвост лога вместо повторной выборки.
+    """
+    if since_log_id is None:
+        events_sql = "SELECT * FROM task_log ORDER BY timestamp DESC, log_id DESC LIMIT ?"
+        events_params: tuple[int, ...] = (events_limit,)
+    else:
+        events_sql = "SELECT * FROM task_log WHERE log_id > ? ORDER BY log_id DESC LIMIT ?"
+        events_params = (since_log_id, events_limit)
+
+    with get_connection() as conn:
+        conn.execute("BEGIN DEFERRED")
+        try:
+            agents = conn.execute("SELECT * FROM agents ORDER BY agent_id").fetchall()
+            tasks = conn.execute("SELECT * FROM tasks ORDER BY priority ASC, task_id ASC").fetchall()
+            locks = conn.execute("SELECT * FROM file_locks ORDER BY locked_at").fetchall()
+            events = conn.execute(events_sql, events_params).fetchall()
+        finally:
+            conn.execute("COMMIT")
+
+    return Snapshot(
+        agents=[Agent.from_row(row) for row in agents],
+        tasks=[Task.from_row(row) for row in tasks],
+        locks=[FileLock.from_row(row) for row in locks],
+        events=[TaskLogEntry.from_row(row) for row in events],
+    )
 
 
 # ============================================================
@@ -1050,6 +1309,15 @@ def save_session_token(token: str, agent_name: str, directory: Path | None = Non
     return session_path, env_command
 
 
+def _read_session_file(path: Path) -> str | None:
+    """Читает файл сессии; None, если его нет (без отдельного exists())."""
+    try:
+        # ВАЖ-4: явное encoding для корректной работы на Windows (cp1251 по умолчанию)
+        return path.read_text(encoding="utf-8").strip()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
 def load_session_token(directory: Path | None = None) -> str | None:
     """Загружает токен сессии из файла или env."""
     env_token = os.environ.get(SESSION_ENV_VAR)
@@ -1057,29 +1325,13 @@ def load_session_token(directory: Path | None = None) -> str | None:
         return env_token.strip()
 
     agent_name = os.environ.get("SWARM_AGENT")
-    if not agent_name:
-        target_dir = directory or Path.cwd()
-        # Проверяем .swarm/sessions/ (новый путь)
-        new_session_path = target_dir / SESSIONS_DIR / SESSION_FILENAME
-        if new_session_path.exists():
-            # ВАЖ-4: явное encoding для корректной работы на Windows
-            return new_session_path.read_text(encoding="utf-8").strip()
-        # Fallback на корень (legacy)
-        old_session_path = target_dir / SESSION_FILENAME
-        if old_session_path.exists():
-            return old_session_path.read_text(encoding="utf-8").strip()
-        return None
-
+    filename = f".swarm_session_{agent_name}" if agent_name else SESSION_FILENAME
     target_dir = directory or Path.cwd()
-    # Проверяем .swarm/sessions/ (новый путь)
-    session_path = target_dir / SESSIONS_DIR / f".swarm_session_{agent_name}"
-    if session_path.exists():
-        return session_path.read_text(encoding="utf-8").strip()
-    # Fallback на корень (legacy)
-    legacy_path = target_dir / f".swarm_session_{agent_name}"
-    if legacy_path.exists():
-        return legacy_path.read_text(encoding="utf-8").strip()
-    return None
+    # Сначала .swarm/sessions/ (новый путь), затем корень (legacy)
+    token = _read_session_file(target_dir / SESSIONS_DIR / filename)
+    if token is None:
+        token = _read_session_file(target_dir / filename)
+    return token
 
 
 def get_current_agent() -> Agent | None:
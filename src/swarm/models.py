@@ -4,7 +4,7 @@
 Dataclass-модели для агентов, задач, блокировок и событий лога.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
@@ -100,7 +100,7 @@ def _parse_dt(value):
     return datetime.fromisoformat(value) if isinstance(value, str) else value
 
 
-@dataclass
+@dataclass(slots=True)
 class Agent:
     """Модель агента."""
 
@@ -132,7 +132,7 @@ class Agent:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """Модель задачи."""
 
@@ -170,7 +170,7 @@ class Task:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class FileLock:
     """Модель блокировки файла."""
 
@@ -192,7 +192,7 @@ class FileLock:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskLogEntry:
     """Запись в логе задач."""
 
@@ -216,7 +216,7 @@ class TaskLogEntry:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class LaunchSession:
     """Сессия запуска терминальных агентов."""
 
@@ -245,7 +245,7 @@ class LaunchSession:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class LaunchSessionAgent:
     """Агент, входящий в launch-сессию."""
 
@@ -280,3 +280,17 @@ class LaunchSessionAgent:
             registered_agent_id=row["registered_agent_id"],
             terminal_pid=row["terminal_pid"],
         )
+
+
+@dataclass
+class Snapshot:
+    """Согласованный срез состояния роя для дашбордов."""
+
+    agents: list[Agent]
+    tasks: list[Task]
+    locks: list[FileLock]
+    events: list[TaskLogEntry]
+    agents_by_id: dict[int, Agent] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.agents_by_id = {a.agent_id: a for a in self.agents}
@@ -90,7 +90,7 @@ def _validate_spec(data: dict) -> None:
         name = agent.get("name")
         role = agent.get("role")
 
-        if cli not in CLI_TYPES:
+        if not isinstance(cli, str) or cli not in CLI_TYPES:
             raise ValueError(f"agents[{idx}].cli должен быть одним из: {', '.join(CLI_TYPES)}")
 
         if not isinstance(name, str):
@@ -101,7 +101,7 @@ def _validate_spec(data: dict) -> None:
             raise ValueError(f"Имя агента '{name}' дублируется в launch spec")
         names.add(name)
 
-        if role not in ALLOWED_ROLES:
+        if not isinstance(role, str) or role not in ALLOWED_ROLES:
             raise ValueError(f"agents[{idx}].role должен быть одним из: architect, developer, tester, devops")
 
 
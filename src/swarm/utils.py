@@ -5,6 +5,7 @@
 import functools
 import json
 import sys
+from enum import Enum
 from pathlib import Path
 
 import typer
@@ -25,15 +26,21 @@ def _configure_stdio_for_unicode() -> None:
       reconfigure(encoding="utf-8")
 
 
+@functools.cache
 def create_console() -> Console:
-  """Создаёт Rich Console после безопасной настройки кодировки потоков."""
+  """Возвращает общую Rich Console после безопасной настройки кодировки потоков.
+
+  Экземпляр создаётся один раз на процесс: Console при инициализации опрашивает
+  терминал, а пишет всегда в текущий sys.stdout, поэтому его можно разделять
+  между модулями команд.
+  """
   _configure_stdio_for_unicode()
   return Console()
 
 
 console = create_console()
 
-# Типы CLI-агентов (единственный источник правды)
+# Типы CLI-агентов (единственный источник правды; порядок важен для init и подсказок)
 CLI_TYPES = ["claude", "codex", "gemini", "opencode", "qwen"]
 
 # Допустимые роли агентов (единственный источник правды)
@@ -51,6 +58,34 @@ def get_version() -> str:
     return "unknown"
 
 
+def truncate(text: str, limit: int, ellipsis: str = "...") -> str:
+  """Обрезает строку до limit символов, заменяя хвост многоточием."""
+  if len(text) <= limit:
+    return text
+  return f"{text[:limit - len(ellipsis)]}{ellipsis}"
+
+
+def truncate_left(text: str, limit: int, ellipsis: str = "...") -> str:
+  """Обрезает строку до limit символов, сохраняя конец (для путей к файлам)."""
+  if len(text) <= limit:
+    return text
+  return f"{ellipsis}{text[len(text) - limit + len(ellipsis):]}"
+
+
+def enum_markup(enum_cls: type[Enum], styles: dict, default: tuple | str, template: str) -> dict:
+  """Заранее рендерит Rich-markup для всех значений enum, чтобы не собирать его на каждом тике.
+
+  Поля записи из styles подставляются в template позиционно ({0}, {1}, ...), значение — как {value};
+  значения без записи берут default, строковая запись считается одним полем.
+  """
+  cells = {}
+  for member in enum_cls:
+    entry = styles.get(member, default)
+    fields = (entry,) if isinstance(entry, str) else entry
+    cells[member] = template.format(*fields, value=member.value)
+  return cells
+
+
 def check_db():
   """Проверяет наличие БД. Завершает процесс, если не найдена."""
   if find_db_path() is None:
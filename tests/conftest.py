@@ -2,8 +2,12 @@
 Общие фикстуры для тестов SWARM.
 """
 
+import contextlib
 import os
+import shutil
 import sys
+import tempfile
+import uuid
 from pathlib import Path
 
 import pytest
@@ -11,44 +15,108 @@ import pytest
 # Добавляем src в путь
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from swarm.db import init_database
+from swarm.db import DB_FILENAME, clear_db_path_cache, close_connections, init_database
+
+# tmpfs в контейнерах бывает крошечным (64 МБ) — ниже этого запаса остаёмся на диске
+_SHM_MIN_FREE = 256 * 1024 * 1024
+
+
+def pytest_configure(config):
+    """Кладёт tmp_path в tmpfs (/dev/shm), если TMPDIR и --basetemp не заданы.
+
+    Каждый тест создаёт swarm.db с WAL — в памяти это заметно быстрее, чем на диске.
+    Меняется только --basetemp (уникальный каталог на запуск), а не tempfile.tempdir,
+    так что остальной код процесса пишет во временный каталог как обычно.
+    Воркеры xdist получают подкаталоги basetemp от контроллера.
+    """
+    shm = "/dev/shm"
+    if config.option.basetemp is not None or "TMPDIR" in os.environ or not os.access(shm, os.W_OK):
+        return
+    if shutil.disk_usage(shm).free < _SHM_MIN_FREE:
+        return
+    config.option.basetemp = tempfile.mkdtemp(prefix="swarm-pytest-", dir=shm)
+    config._swarm_shm_basetemp = config.option.basetemp
+
+
+def pytest_unconfigure(config):
+    """Удаляет basetemp в tmpfs, созданный в pytest_configure, — память не копится между запусками."""
+    basetemp = getattr(config, "_swarm_shm_basetemp", None)
+    if basetemp is not None:
+        shutil.rmtree(basetemp, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _isolate_session_env(monkeypatch):
+    """Убирает SWARM_SESSION/SWARM_AGENT и восстанавливает их после теста.
+
+    join/save_session_token пишут SWARM_AGENT в os.environ — monkeypatch
+    откатывает это, так что тесты не зависят от порядка и воркера xdist.
+    """
+    monkeypatch.delenv("SWARM_SESSION", raising=False)
+    monkeypatch.delenv("SWARM_AGENT", raising=False)
+
+
+@pytest.fixture(scope="session")
+def _db_template(tmp_path_factory):
+    """Один раз создаёт пустую swarm.db со схемой — её копируют тесты."""
+    return init_database(tmp_path_factory.mktemp("db_template"))
 
 
 @pytest.fixture
-def temp_db(tmp_path):
+def temp_db(tmp_path, _db_template, monkeypatch):
     """
     Создаёт временную базу данных для тестов.
 
-    Очищает переменные окружения SWARM_SESSION и SWARM_AGENT
-    для изоляции тестов при параллельном запуске.
-    Возвращает путь к директории с БД.
+    Копирует готовую БД вместо повторного выполнения схемы,
+    переходит в директорию с БД и возвращает путь к ней.
     """
-    init_database(tmp_path)
+    shutil.copyfile(_db_template, tmp_path / DB_FILENAME)
+    clear_db_path_cache()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
 
-    # Сохраняем текущую директорию
-    original_cwd = os.getcwd()
 
-    # Очищаем env-переменные для изоляции тестов
-    old_session = os.environ.pop("SWARM_SESSION", None)
-    old_agent = os.environ.pop("SWARM_AGENT", None)
+@pytest.fixture(scope="session")
+def _init_template(tmp_path_factory):
+    """Один раз выполняет `swarm init` — результат копируется в каждый тест."""
+    from typer.testing import CliRunner
 
-    # Переходим в директорию с БД
-    os.chdir(tmp_path)
+    from swarm.cli import app
 
-    yield tmp_path
+    template = tmp_path_factory.mktemp("swarm_template")
+    with contextlib.chdir(template):
+        result = CliRunner().invoke(app, ["init"])
+        # Закрываем соединение, чтобы WAL слился в swarm.db до копирования
+        close_connections()
+    assert result.exit_code == 0, result.stdout
+    # SKILL.md проверяет TestInitCommand; остальным тестам нужны только БД и .swarm/
+    for path in template.iterdir():
+        if path.is_dir() and path.name != ".swarm":
+            shutil.rmtree(path)
+    return template
 
-    # Возвращаемся
-    os.chdir(original_cwd)
 
-    # Восстанавливаем env-переменные
-    if old_session is not None:
-        os.environ["SWARM_SESSION"] = old_session
-    else:
-        os.environ.pop("SWARM_SESSION", None)
-    if old_agent is not None:
-        os.environ["SWARM_AGENT"] = old_agent
-    else:
-        os.environ.pop("SWARM_AGENT", None)
+@pytest.fixture
+def initialized_project(tmp_path, _init_template, monkeypatch):
+    """Проект после `swarm init` в tmp_path (копия шаблона вместо повторного init)."""
+    shutil.copytree(_init_template, tmp_path, dirs_exist_ok=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    """Регистрирует агента в обход CLI — как `swarm join`: строка в БД, файл сессии, SWARM_AGENT."""
+    from swarm.db import register_agent, save_session_token
+
+    def _make_agent(name: str, role: str = "developer", cli_type: str = "claude"):
+        token = uuid.uuid4().hex
+        agent = register_agent(token, cli_type, name, role, pid=os.getpid())
+        monkeypatch.setenv("SWARM_AGENT", name)
+        save_session_token(token, name)
+        return agent
+
+    return _make_agent
 
 
 @pytest.fixture
@@ -9,6 +9,8 @@ from pathlib import Path
 import pytest
 
 from swarm.db import (
+    DB_FILENAME,
+    get_agent_by_name,
     get_agent_by_session,
     get_all_agents,
     get_current_agent,
@@ -75,6 +77,17 @@ class TestAgentStatus:
         # Heartbeat должен обновиться (сравниваем как строки для SQLite)
         assert agent.last_heartbeat >= original_hb
 
+    def test_lookup_sees_write_from_other_connection(self, sample_agent, temp_db):
+        """Поиск агента перечитывает БД: видна запись другого процесса."""
+        get_agent_by_name(sample_agent.name)
+
+        conn = sqlite3.connect(str(temp_db / DB_FILENAME))
+        conn.execute("UPDATE agents SET status = 'waiting' WHERE agent_id = ?", (sample_agent.agent_id,))
+        conn.commit()
+        conn.close()
+
+        assert get_agent_by_name(sample_agent.name).status == AgentStatus.WAITING
+
 
 class TestSessionManagement:
     """Тесты управления сессией."""
@@ -3,12 +3,26 @@
 """
 
 import json
-import os
+import re
+import subprocess
+import sys
+from unittest.mock import patch
 
+import pytest
 from typer.testing import CliRunner
 
 from swarm.cli import app
-from swarm.db import DB_FILENAME, get_launch_sessions
+from swarm.db import (
+    DB_FILENAME,
+    claim_next_task,
+    create_task,
+    get_all_tasks,
+    get_launch_sessions,
+    get_recent_events,
+    log_event,
+    register_agent,
+)
+from swarm.models import EventType
 
 runner = CliRunner()
 
@@ -74,92 +88,86 @@ class TestHelpSuppression:
         assert "Commands" not in result.stderr
         assert "join" not in result.stderr
 
-    def test_init_refuses_without_force(self, tmp_path, monkeypatch):
+    def test_init_refuses_without_force(self, initialized_project):
         """Проверяет отказ перезаписи без --force."""
-        monkeypatch.chdir(tmp_path)
-
-        # Первая инициализация
-        runner.invoke(app, ["init"])
+        create_task("Не должна пропасть", priority=1)
 
-        # Попытка повторной
+        # Попытка повторной инициализации
         result = runner.invoke(app, ["init"])
 
         assert result.exit_code == 1
         assert "уже существует" in result.stdout
+        assert len(get_all_tasks()) == 1
 
-    def test_init_force_recreates(self, tmp_path, monkeypatch):
+    def test_init_force_recreates(self, initialized_project):
         """Проверяет пересоздание с --force."""
-        monkeypatch.chdir(tmp_path)
+        create_task("Старая задача", priority=1)
 
-        runner.invoke(app, ["init"])
         result = runner.invoke(app, ["init", "--force"])
 
         assert result.exit_code == 0
         assert "инициализирован" in result.stdout
+        assert get_all_tasks() == []
 
 
-class TestTaskCommands:
-    """Тесты команд управления задачами."""
-
-    def test_task_add(self, tmp_path, monkeypatch):
-        """Проверяет создание задачи."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
+class TestLazyImports:
+    """Тесты ленивой загрузки тяжёлых команд."""
 
-        result = runner.invoke(
-            app,
-            [
-                "task",
-                "add",
-                "--desc",
-                "Тестовая задача",
-                "--priority",
-                "1",
-            ],
+    def test_cli_import_does_not_load_textual(self):
+        """Импорт swarm.cli не должен тянуть Textual и модуль TUI."""
+        code = (
+            "import sys, swarm.cli; "
+            "print('swarm.commands.tui' in sys.modules, 'textual' in sys.modules)"
         )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
 
-        assert result.exit_code == 0
-        assert "Задача #1 создана" in result.stdout
+        assert result.stdout.split() == ["False", "False"]
 
-    def test_task_add_with_filters(self, tmp_path, monkeypatch):
-        """Проверяет создание задачи с фильтрами."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
+    def test_cli_import_does_not_load_rich_layout(self):
+        """rich.layout (и тянущиеся за ним rich.pretty/attrs) грузится только при запуске монитора."""
+        code = "import sys, swarm.cli; print('rich.layout' in sys.modules, 'rich.pretty' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
 
-        result = runner.invoke(
-            app,
-            [
-                "task",
-                "add",
-                "--desc",
-                "Задача для архитектора",
-                "--role",
-                "architect",
-                "--cli",
-                "claude",
-            ],
-        )
+        assert result.stdout.split() == ["False", "False"]
+
+    def test_cli_import_does_not_load_rich_table(self):
+        """rich.table импортируется командами, которые выводят таблицы, а не при старте CLI."""
+        code = "import sys, swarm.cli; print('rich.table' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip() == "False"
+
+
+class TestTaskCommands:
+    """Тесты команд управления задачами."""
+
+    @pytest.mark.parametrize(
+        ("args", "expected"),
+        [
+            (["--desc", "Тестовая задача", "--priority", "1"], ["Задача #1 создана"]),
+            (["--desc", "Задача для архитектора", "--role", "architect", "--cli", "claude"], ["role=architect", "cli=claude"]),
+        ],
+        ids=["plain", "with-filters"],
+    )
+    def test_task_add(self, initialized_project, args, expected):
+        """Проверяет создание задачи, в том числе с фильтрами."""
+        result = runner.invoke(app, ["task", "add", *args])
 
         assert result.exit_code == 0
-        assert "role=architect" in result.stdout
-        assert "cli=claude" in result.stdout
+        for text in expected:
+            assert text in result.stdout
 
-    def test_task_list_empty(self, tmp_path, monkeypatch):
+    def test_task_list_empty(self, initialized_project):
         """Проверяет пустой список задач."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(app, ["task", "list"])
 
         assert result.exit_code == 0
         assert "Задач не найдено" in result.stdout
 
-    def test_task_list_with_tasks(self, tmp_path, monkeypatch):
+    def test_task_list_with_tasks(self, initialized_project):
         """Проверяет список с задачами."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["task", "add", "--desc", "Задача 1", "--priority", "1"])
-        runner.invoke(app, ["task", "add", "--desc", "Задача 2", "--priority", "2"])
+        create_task("Задача 1", priority=1)
+        create_task("Задача 2", priority=2)
 
         result = runner.invoke(app, ["task", "list"])
 
@@ -171,11 +179,8 @@ class TestTaskCommands:
 class TestAgentCommands:
     """Тесты команд агентов."""
 
-    def test_join_interactive(self, tmp_path, monkeypatch):
+    def test_join_interactive(self, initialized_project, tmp_path):
         """Проверяет регистрацию агента."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(
             app,
             [
@@ -194,21 +199,16 @@ class TestAgentCommands:
         # Файл сессии в .swarm/sessions/
         assert (tmp_path / ".swarm" / "sessions" / ".swarm_session_test-agent").exists()
 
-    def test_agents_empty(self, tmp_path, monkeypatch):
+    def test_agents_empty(self, initialized_project):
         """Проверяет пустой список агентов."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(app, ["agents"])
 
         assert result.exit_code == 0
         assert "агентов нет" in result.stdout
 
-    def test_agents_with_registered(self, tmp_path, monkeypatch):
+    def test_agents_with_registered(self, initialized_project, make_agent):
         """Проверяет список с агентами."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "alice", "--role", "developer"])
+        make_agent("alice")
 
         result = runner.invoke(app, ["agents"])
 
@@ -216,21 +216,16 @@ class TestAgentCommands:
         assert "alice" in result.stdout
         assert "claude" in result.stdout
 
-    def test_status_not_registered(self, tmp_path, monkeypatch):
+    def test_status_not_registered(self, initialized_project):
         """Проверяет ошибку статуса без регистрации."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(app, ["status"])
 
         assert result.exit_code == 1
         assert "не зарегистрирован" in result.stdout
 
-    def test_status_registered(self, tmp_path, monkeypatch):
+    def test_status_registered(self, initialized_project, make_agent):
         """Проверяет статус зарегистрированного агента."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "bob", "--role", "tester"])
+        make_agent("bob", "tester")
 
         result = runner.invoke(app, ["status"])
 
@@ -238,11 +233,9 @@ class TestAgentCommands:
         assert "bob" in result.stdout
         assert "tester" in result.stdout
 
-    def test_heartbeat_updates_agent(self, tmp_path, monkeypatch):
+    def test_heartbeat_updates_agent(self, initialized_project, make_agent):
         """Проверяет отдельную команду heartbeat."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "bob", "--role", "tester"])
+        make_agent("bob", "tester")
 
         result = runner.invoke(app, ["heartbeat"])
 
@@ -253,23 +246,19 @@ class TestAgentCommands:
 class TestNextAndDone:
     """Тесты получения и завершения задач."""
 
-    def test_next_no_tasks(self, tmp_path, monkeypatch):
+    def test_next_no_tasks(self, initialized_project, make_agent):
         """Проверяет поведение при отсутствии задач."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
+        make_agent("agent")
 
         result = runner.invoke(app, ["next"])
 
         assert result.exit_code == 0
         assert "Нет подходящих задач" in result.stdout
 
-    def test_next_gets_task(self, tmp_path, monkeypatch):
+    def test_next_gets_task(self, initialized_project, make_agent):
         """Проверяет получение задачи."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["task", "add", "--desc", "Реализовать функцию", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
+        create_task("Реализовать функцию", priority=1)
+        make_agent("agent")
 
         result = runner.invoke(app, ["next"])
 
@@ -277,24 +266,19 @@ class TestNextAndDone:
         assert "Задача #1" in result.stdout
         assert "Реализовать функцию" in result.stdout
 
-    def test_done_completes_task(self, tmp_path, monkeypatch):
+    def test_done_completes_task(self, initialized_project, make_agent):
         """Проверяет завершение задачи."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
-        runner.invoke(app, ["next"])
+        create_task("Задача", priority=1)
+        claim_next_task(make_agent("agent"))
 
         result = runner.invoke(app, ["done", "--summary", "Готово"])
 
         assert result.exit_code == 0
         assert "Задача #1 завершена" in result.stdout
 
-    def test_done_without_task_fails(self, tmp_path, monkeypatch):
+    def test_done_without_task_fails(self, initialized_project, make_agent):
         """Проверяет ошибку завершения без задачи."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
+        make_agent("agent")
 
         result = runner.invoke(app, ["done", "--summary", "Что-то"])
 
@@ -305,23 +289,19 @@ class TestNextAndDone:
 class TestPermissions:
     """Тесты ограничений прав для агента."""
 
-    def test_agent_cannot_add_task(self, tmp_path, monkeypatch):
+    def test_agent_cannot_add_task(self, initialized_project, make_agent):
         """Агент не должен менять очередь задач."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
+        make_agent("agent")
 
         result = runner.invoke(app, ["task", "add", "--desc", "Нельзя", "--priority", "1"])
 
         assert result.exit_code == 1
         assert "не может изменять очередь задач" in result.stdout
 
-    def test_anonymous_can_force_unlock(self, tmp_path, monkeypatch):
+    def test_anonymous_can_force_unlock(self, initialized_project, make_agent, monkeypatch):
         """Лидер/оркестратор может использовать --force без регистрации."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "holder", "--role", "developer"])
+        make_agent("holder")
         runner.invoke(app, ["next"])
         runner.invoke(app, ["lock", "file.py"])
 
@@ -334,12 +314,10 @@ class TestPermissions:
         assert result.exit_code == 0
         assert "разблокирован" in result.stdout.lower()
 
-    def test_agent_can_force_unlock_own_file(self, tmp_path, monkeypatch):
+    def test_agent_can_force_unlock_own_file(self, initialized_project, make_agent):
         """Зарегистрированный агент может использовать --force для разблокировки."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
+        make_agent("agent")
         runner.invoke(app, ["next"])
         runner.invoke(app, ["lock", "file.py"])
 
@@ -352,43 +330,50 @@ class TestPermissions:
 class TestStartCommand:
     """Тесты команды start."""
 
-    def test_start_no_agents(self, tmp_path, monkeypatch):
-        """Проверяет start без агентов."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
-        result = runner.invoke(app, ["start", "--all"])
+    @pytest.mark.parametrize("args", [["--all"], ["--agent", "ghost"], ["--cli", "codex"], []])
+    def test_start_no_agents(self, initialized_project, args):
+        """Проверяет start без агентов при любом фильтре."""
+        result = runner.invoke(app, ["start", *args])
 
         assert result.exit_code == 0
         assert "Нет зарегистрированных агентов" in result.stdout
 
-    def test_start_all(self, tmp_path, monkeypatch):
+    def test_start_all(self, initialized_project):
         """Проверяет start --all."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent1", "--role", "developer"])
-
-        # Очищаем переменные окружения для регистрации второго агента
-        # (теперь у каждого агента свой файл .swarm_session_<имя>)
-        if "SWARM_SESSION" in os.environ:
-            del os.environ["SWARM_SESSION"]
-        if "SWARM_AGENT" in os.environ:
-            del os.environ["SWARM_AGENT"]
-        runner.invoke(app, ["join", "--cli", "codex", "--name", "agent2", "--role", "tester"])
+        register_agent("start-token-1", "claude", "agent1", "developer")
+        register_agent("start-token-2", "codex", "agent2", "tester")
 
         result = runner.invoke(app, ["start", "--all"])
 
         assert result.exit_code == 0
         assert "2 агентов" in result.stdout
 
+    def test_start_by_agent_and_cli(self, initialized_project, make_agent):
+        """Проверяет start --agent и --cli, включая ненайденных агентов."""
+        make_agent("agent1")
+
+        result = runner.invoke(app, ["start", "--agent", "agent1"])
+        assert result.exit_code == 0
+        assert "1 агентов" in result.stdout
+
+        result = runner.invoke(app, ["start", "--cli", "claude"])
+        assert result.exit_code == 0
+        assert "agent1 (claude/developer)" in result.stdout
+
+        result = runner.invoke(app, ["start", "--agent", "ghost"])
+        assert result.exit_code == 1
+        assert "не найден" in result.stdout
+
+        result = runner.invoke(app, ["start", "--cli", "codex"])
+        assert result.exit_code == 1
+        assert "не найдены" in result.stdout
+
 
 class TestTaskCloseCommand:
     """Тесты команды task close."""
 
-    def test_close_task(self, tmp_path, monkeypatch):
+    def test_close_task(self, initialized_project):
         """Принудительное закрытие задачи через CLI."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Для закрытия", "--priority", "1"])
 
         result = runner.invoke(app, ["task", "close", "1", "--reason", "Тестовое закрытие"])
@@ -396,22 +381,17 @@ class TestTaskCloseCommand:
         assert result.exit_code == 0
         assert "принудительно закрыта" in result.stdout
 
-    def test_close_nonexistent_task(self, tmp_path, monkeypatch):
+    def test_close_nonexistent_task(self, initialized_project):
         """Закрытие несуществующей задачи даёт ошибку."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(app, ["task", "close", "999"])
 
         assert result.exit_code == 1
         assert "не найдена" in result.stdout
 
-    def test_agent_cannot_close_task(self, tmp_path, monkeypatch):
+    def test_agent_cannot_close_task(self, initialized_project, make_agent):
         """Агент не может закрывать задачи."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
+        make_agent("agent")
 
         result = runner.invoke(app, ["task", "close", "1"])
 
@@ -422,10 +402,8 @@ class TestTaskCloseCommand:
 class TestTaskAssignCommand:
     """Тесты команды task assign."""
 
-    def test_assign_task(self, tmp_path, monkeypatch):
+    def test_assign_task(self, initialized_project):
         """Назначение задачи через CLI."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Для назначения", "--priority", "1"])
 
         result = runner.invoke(app, ["task", "assign", "1", "--agent", "worker-1"])
@@ -433,11 +411,8 @@ class TestTaskAssignCommand:
         assert result.exit_code == 0
         assert "назначена" in result.stdout
 
-    def test_assign_nonexistent_task(self, tmp_path, monkeypatch):
+    def test_assign_nonexistent_task(self, initialized_project):
         """Назначение несуществующей задачи даёт ошибку."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(app, ["task", "assign", "999", "--agent", "x"])
 
         assert result.exit_code == 1
@@ -447,13 +422,11 @@ class TestTaskAssignCommand:
 class TestTaskResetCommand:
     """Тесты команды task reset."""
 
-    def test_reset_task(self, tmp_path, monkeypatch):
+    def test_reset_task(self, initialized_project, make_agent, monkeypatch):
         """Сброс задачи через CLI."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Для сброса", "--priority", "1"])
         # Имитируем in_progress: join + next
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "worker", "--role", "developer"])
+        make_agent("worker")
         runner.invoke(app, ["next"])
         # Убираем сессию агента чтобы стать Лидером
         monkeypatch.delenv("SWARM_AGENT", raising=False)
@@ -463,22 +436,17 @@ class TestTaskResetCommand:
         assert result.exit_code == 0
         assert "сброшена в pending" in result.stdout
 
-    def test_reset_nonexistent_task(self, tmp_path, monkeypatch):
+    def test_reset_nonexistent_task(self, initialized_project):
         """Сброс несуществующей задачи даёт ошибку."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(app, ["task", "reset", "999"])
 
         assert result.exit_code == 1
         assert "не найдена" in result.stdout
 
-    def test_agent_cannot_reset_task(self, tmp_path, monkeypatch):
+    def test_agent_cannot_reset_task(self, initialized_project, make_agent):
         """Агент не может сбрасывать задачи."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
+        make_agent("agent")
 
         result = runner.invoke(app, ["task", "reset", "1"])
 
@@ -489,12 +457,10 @@ class TestTaskResetCommand:
 class TestLockUnlockCommands:
     """Тесты команд lock и unlock."""
 
-    def test_lock_and_unlock(self, tmp_path, monkeypatch):
+    def test_lock_and_unlock(self, initialized_project, make_agent):
         """Полный цикл блокировки и разблокировки."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "locker", "--role", "developer"])
+        make_agent("locker")
         runner.invoke(app, ["next"])
 
         # Блокируем
@@ -507,23 +473,19 @@ class TestLockUnlockCommands:
         assert result.exit_code == 0
         assert "разблокирован" in result.stdout.lower()
 
-    def test_lock_without_task_fails(self, tmp_path, monkeypatch):
+    def test_lock_without_task_fails(self, initialized_project, make_agent):
         """Блокировка без активной задачи даёт ошибку."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "idle-agent", "--role", "developer"])
+        make_agent("idle-agent")
 
         result = runner.invoke(app, ["lock", "file.py"])
 
         assert result.exit_code == 1
         assert "нет активной задачи" in result.stdout
 
-    def test_unlock_all_force(self, tmp_path, monkeypatch):
+    def test_unlock_all_force(self, initialized_project, make_agent):
         """unlock --all --force снимает все блокировки."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "force-agent", "--role", "developer"])
+        make_agent("force-agent")
         runner.invoke(app, ["next"])
         runner.invoke(app, ["lock", "a.py"])
 
@@ -532,11 +494,8 @@ class TestLockUnlockCommands:
         assert result.exit_code == 0
         assert "Снято блокировок" in result.stdout
 
-    def test_anonymous_can_unlock_all_force(self, tmp_path, monkeypatch):
+    def test_anonymous_can_unlock_all_force(self, initialized_project):
         """Лидер/оркестратор может использовать --all --force без регистрации."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(app, ["unlock", "--all", "--force"])
 
         assert result.exit_code == 0
@@ -546,12 +505,10 @@ class TestLockUnlockCommands:
 class TestUnlockWithAgentFlag:
     """Тесты unlock с флагом --agent."""
 
-    def test_unlock_with_agent_flag(self, tmp_path, monkeypatch):
+    def test_unlock_with_agent_flag(self, initialized_project, make_agent, monkeypatch):
         """unlock --file X --agent имя снимает блокировку без env vars."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "unlocker", "--role", "developer"])
+        make_agent("unlocker")
         runner.invoke(app, ["next", "--agent", "unlocker"])
         runner.invoke(app, ["lock", "test.py", "--agent", "unlocker"])
 
@@ -568,55 +525,46 @@ class TestUnlockWithAgentFlag:
 class TestLogsCommand:
     """Тесты команды logs."""
 
-    def test_logs_empty(self, tmp_path, monkeypatch):
+    def test_logs_empty(self, initialized_project):
         """Проверяет пустой журнал."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         result = runner.invoke(app, ["logs"])
 
         # При init создаётся только БД, событий пока нет
         # Но после join появятся
         assert result.exit_code == 0
 
-    def test_logs_with_events(self, tmp_path, monkeypatch):
+    def test_logs_with_events(self, initialized_project, make_agent):
         """Проверяет журнал с событиями."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "agent", "--role", "developer"])
+        make_agent("agent")
 
         result = runner.invoke(app, ["logs"])
 
         assert result.exit_code == 0
         # Текст может быть усечён в таблице, ищем часть
-        assert "agent_register" in result.stdout or "зарегистрирован" in result.stdout
+        assert re.search("agent_register|зарегистрирован", result.stdout)
+        # Время события выводится как ЧЧ:ММ:СС
+        assert re.search(r"\b\d{2}:\d{2}:\d{2}\b", result.stdout)
 
-    def test_logs_with_limit(self, tmp_path, monkeypatch):
+    def test_logs_with_limit(self, initialized_project, make_agent):
         """Проверяет параметр --limit."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "lim-agent", "--role", "developer"])
+        make_agent("lim-agent")
 
         result = runner.invoke(app, ["logs", "-n", "5"])
 
         assert result.exit_code == 0
         assert "лимит: 5" in result.stdout
 
-    def test_logs_with_since(self, tmp_path, monkeypatch):
+    def test_logs_with_since(self, initialized_project, make_agent):
         """Проверяет параметр --since."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "since-agent", "--role", "developer"])
+        make_agent("since-agent")
 
         result = runner.invoke(app, ["logs", "--since", "1"])
 
         assert result.exit_code == 0
         assert "за последние 1.0ч" in result.stdout
 
-    def test_task_add_logs_event(self, tmp_path, monkeypatch):
+    def test_task_add_logs_event(self, initialized_project):
         """Создание задачи записывает task_created в лог."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
         runner.invoke(app, ["task", "add", "--desc", "Тестовая задача", "--priority", "2"])
 
         result = runner.invoke(app, ["logs"])
@@ -625,14 +573,32 @@ class TestLogsCommand:
         assert "task_created" in result.stdout
 
 
+class TestMonitorCommand:
+    """Тесты команды monitor."""
+
+    def test_monitor_backs_off_when_idle(self, initialized_project):
+        """Без изменений интервал растёт до потолка, после события сбрасывается."""
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(round(seconds, 2))
+            if len(sleeps) == 5:
+                log_event(EventType.ERROR, message="tick")
+            if len(sleeps) > 6:
+                raise KeyboardInterrupt
+
+        with patch("swarm.commands.monitor.time.sleep", side_effect=fake_sleep), patch("swarm.commands.monitor.Live"):
+            result = runner.invoke(app, ["monitor", "--refresh", "2"])
+
+        assert result.exit_code == 0
+        assert sleeps == [2.0, 3.0, 4.5, 6.75, 10.0, 2.0, 3.0]
+
+
 class TestTerminalCommands:
     """Тесты команды swarm terminal."""
 
-    def test_terminal_launch_dry_run(self, tmp_path, monkeypatch):
+    def test_terminal_launch_dry_run(self, initialized_project, tmp_path, monkeypatch):
         """dry-run создаёт launch session без старта wt."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         from swarm.commands import terminal as terminal_cmd
 
         monkeypatch.setattr(terminal_cmd, "run_preflight", lambda spec, require_wt=True: [])
@@ -664,11 +630,8 @@ class TestTerminalCommands:
         assert "Dry-run выполнен" in result.stdout
         assert len(get_launch_sessions()) == 1
 
-    def test_terminal_reconcile_marks_registered(self, tmp_path, monkeypatch):
+    def test_terminal_reconcile_marks_registered(self, initialized_project, make_agent, tmp_path, monkeypatch):
         """reconcile отображает зарегистрированного агента."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         from swarm.commands import terminal as terminal_cmd
 
         monkeypatch.setattr(terminal_cmd, "run_preflight", lambda spec, require_wt=True: [])
@@ -695,7 +658,7 @@ class TestTerminalCommands:
         launch_result = runner.invoke(app, ["terminal", "launch", "--spec", str(spec_path), "--yes", "--dry-run"])
         assert launch_result.exit_code == 0
 
-        runner.invoke(app, ["join", "--cli", "claude", "--name", "term-reconcile-1", "--role", "developer"])
+        make_agent("term-reconcile-1")
 
         session_id = get_launch_sessions()[0].session_id
         reconcile_result = runner.invoke(app, ["terminal", "reconcile", "--session", session_id])
@@ -703,11 +666,14 @@ class TestTerminalCommands:
         assert reconcile_result.exit_code == 0
         assert "registered" in reconcile_result.stdout.lower()
 
-    def test_terminal_launch_exclude_cli(self, tmp_path, monkeypatch):
-        """--exclude-cli создаёт отдельный spec для исключённых агентов."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
+        events = {e.event: e for e in get_recent_events(limit=10)}
+        assert EventType.LAUNCH_SESSION_COMPLETED in events
+        registered = events[EventType.LAUNCH_AGENT_REGISTERED]
+        assert registered.agent_id is not None
+        assert "term-reconcile-1" in registered.message
 
+    def test_terminal_launch_exclude_cli(self, initialized_project, tmp_path, monkeypatch):
+        """--exclude-cli создаёт отдельный spec для исключённых агентов."""
         from swarm.commands import terminal as terminal_cmd
 
         monkeypatch.setattr(terminal_cmd, "run_preflight", lambda spec, require_wt=True: [])
@@ -746,11 +712,8 @@ class TestTerminalCommands:
         assert "Ручной запуск" in result.stdout
         assert "swarm terminal launch --spec" in result.stdout
 
-    def test_terminal_stop(self, tmp_path, monkeypatch):
+    def test_terminal_stop(self, initialized_project, tmp_path, monkeypatch):
         """stop переводит launch session в stopped."""
-        monkeypatch.chdir(tmp_path)
-        runner.invoke(app, ["init"])
-
         from swarm.commands import terminal as terminal_cmd
 
         monkeypatch.setattr(terminal_cmd, "run_preflight", lambda spec, require_wt=True: [])
@@ -3,44 +3,57 @@
 """
 
 import sqlite3
+import subprocess
+import sys
 import threading
 from pathlib import Path
 
 import pytest
 
 from swarm.db import (
+    _CLAIM_CANDIDATE_SQL,
     DB_FILENAME,
     SESSIONS_DIR,
     add_launch_session_agent,
+    alive_pids,
     assign_task_to_agent,
     claim_next_task,
     cleanup_dead_agents,
+    close_connections,
     complete_task,
     create_launch_session,
     create_task,
+    create_tasks_bulk,
     find_db_path,
     force_close_task,
     get_active_launch_agent_names,
+    get_agent_by_id,
     get_agent_by_name,
     get_agent_by_session,
     get_all_agents,
     get_all_locks,
     get_all_tasks,
+    get_connection,
     get_file_lock,
     get_launch_session,
     get_launch_session_agents,
     get_launch_sessions,
     get_recent_events,
     get_task,
+    get_task_status_counts,
     init_database,
     load_session_token,
     log_event,
+    log_events,
     reconcile_launch_session,
     register_agent,
     save_session_token,
+    snapshot,
+    transaction,
     try_lock_file,
     unlock_file,
     unlock_task_files,
+    update_agent_status,
     update_launch_agent_status,
     update_launch_session_status,
     validate_agent_name,
@@ -77,6 +90,95 @@ class TestDatabaseInit:
         assert found is not None
         assert found.exists()
 
+    def test_find_db_path_cache_revalidates(self, tmp_path):
+        """Закешированный путь перепроверяется: удалённая БД не возвращается."""
+        db_path = init_database(tmp_path)
+        nested = tmp_path / "a" / "b"
+        nested.mkdir(parents=True)
+
+        assert find_db_path(nested) == db_path
+        assert find_db_path(nested) == db_path
+
+        db_path.unlink()
+
+        assert find_db_path(nested) is None
+
+    def test_init_database_resets_cache(self, tmp_path):
+        """После init ближайшая БД находится, даже если закеширована родительская."""
+        parent_db = init_database(tmp_path)
+        nested = tmp_path / "child"
+        nested.mkdir()
+
+        assert find_db_path(nested) == parent_db
+
+        nested_db = init_database(nested)
+
+        assert find_db_path(nested) == nested_db
+
+
+class TestConnectionReuse:
+    """Тесты переиспользования соединения."""
+
+    def test_connection_reused_within_thread(self, temp_db):
+        """Повторный вызов в том же потоке возвращает то же соединение."""
+        with get_connection() as first:
+            pass
+        with get_connection() as second:
+            assert second is first
+
+    def test_unfinished_transaction_rolled_back(self, temp_db):
+        """Незакрытая транзакция откатывается при выходе из контекста."""
+        with get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO tasks (description) VALUES ('x')")
+        with get_connection() as conn:
+            assert not conn.in_transaction
+
+    def test_snapshot_since_log_id(self, temp_db):
+        """С since_log_id возвращаются только новые события, от новых к старым."""
+        log_event(EventType.ERROR, message="old")
+        last_id = snapshot().events[0].log_id
+        log_event(EventType.ERROR, message="new-1")
+        log_event(EventType.ERROR, message="new-2")
+
+        snap = snapshot(since_log_id=last_id)
+        assert [e.message for e in snap.events] == ["new-2", "new-1"]
+        assert snapshot(since_log_id=snap.events[0].log_id).events == []
+        assert get_all_tasks() == []
+
+    def test_transaction_commits_and_rolls_back(self, sample_agent):
+        """transaction() фиксирует записи целиком или откатывает их при ошибке."""
+        with transaction() as conn:
+            log_event(EventType.ERROR, agent_id=sample_agent.agent_id, message="ok", conn=conn)
+            update_agent_status(sample_agent.agent_id, AgentStatus.WAITING, conn=conn)
+
+        assert get_agent_by_name("test-agent").status == AgentStatus.WAITING
+
+        with pytest.raises(RuntimeError), transaction() as conn:
+            log_event(EventType.ERROR, message="lost", conn=conn)
+            raise RuntimeError
+
+        assert [e.message for e in get_recent_events(limit=10)].count("lost") == 0
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Windows не удаляет открытый файл")
+    def test_recreated_db_gets_new_connection(self, temp_db):
+        """После удаления и пересоздания БД открывается новое соединение."""
+        with get_connection() as old:
+            pass
+        (temp_db / DB_FILENAME).unlink()
+        init_database(temp_db)
+        with get_connection() as new:
+            assert new is not old
+            new.execute("SELECT 1 FROM agents").fetchall()
+
+    def test_close_connections(self, temp_db):
+        """close_connections закрывает соединение потока."""
+        with get_connection() as old:
+            pass
+        close_connections()
+        with pytest.raises(sqlite3.ProgrammingError):
+            old.execute("SELECT 1")
+
 
 class TestAgents:
     """Тесты операций с агентами."""
@@ -150,9 +252,13 @@ class TestTasks:
 
     def test_get_all_tasks(self, temp_db):
         """Проверяет получение списка задач."""
-        create_task("Задача 1", priority=3)
-        create_task("Задача 2", priority=1)
-        create_task("Задача 3", priority=2)
+        create_tasks_bulk(
+            [
+                ("Задача 1", 3, None, None, None, None),
+                ("Задача 2", 1, None, None, None, None),
+                ("Задача 3", 2, None, None, None, None),
+            ]
+        )
 
         tasks = get_all_tasks()
 
@@ -162,6 +268,17 @@ class TestTasks:
         assert tasks[1].priority == 2
         assert tasks[2].priority == 3
 
+    def test_exclude_done_and_status_counts(self, sample_agent):
+        """exclude_done убирает завершённые, счётчики считаются по всем задачам."""
+        create_task("Активная", priority=1)
+        create_task("Готовая", priority=2)
+        claim_next_task(sample_agent)
+        complete_task(get_agent_by_name("test-agent"), "ok")
+
+        active = get_all_tasks(exclude_done=True)
+        assert [t.description for t in active] == ["Готовая"]
+        assert get_task_status_counts() == {TaskStatus.DONE: 1, TaskStatus.PENDING: 1}
+
     def test_get_tasks_by_status(self, temp_db):
         """Проверяет фильтрацию по статусу."""
         create_task("Задача pending")
@@ -237,6 +354,12 @@ class TestFileLocks:
         assert second is False
         assert get_file_lock("second.py") is None
 
+    def test_relock_same_file_by_owner(self, sample_agent, sample_task):
+        """Проверяет, что повторная блокировка своего файла успешна."""
+        assert try_lock_file(sample_agent.agent_id, sample_task.task_id, "same.py") is True
+        assert try_lock_file(sample_agent.agent_id, sample_task.task_id, "same.py") is True
+        assert get_file_lock("same.py").locked_by == sample_agent.agent_id
+
 
 class TestCleanup:
     """Тесты очистки неактивных агентов."""
@@ -279,6 +402,96 @@ class TestCleanup:
         assert removed == 1
         assert get_all_agents() == []
 
+    def test_cleanup_removes_many_agents_and_probes_each_pid_once(self, temp_db, monkeypatch):
+        """Несколько мёртвых агентов удаляются за раз, каждый PID проверяется один раз."""
+        task = create_task("Задача мёртвого агента", priority=1)
+        first = register_agent("token-d1", "claude", "dead-1", "developer", pid=4242)
+        register_agent("token-d2", "codex", "dead-2", "developer", pid=4242)
+        register_agent("token-ok", "gemini", "alive", "developer", pid=4343)
+        claim_next_task(first)
+        try_lock_file(first.agent_id, task.task_id, "dead.py")
+
+        probed = []
+
+        def fake_alive(pid):
+            probed.append(pid)
+            return pid == 4343
+
+        monkeypatch.setattr("swarm.db.is_process_alive", fake_alive)
+
+        removed = cleanup_dead_agents(timeout_minutes=30, check_pid=True)
+
+        assert removed == 2
+        assert sorted(probed) == [4242, 4343]
+        assert [a.name for a in get_all_agents()] == ["alive"]
+        assert get_task(task.task_id).status == TaskStatus.FAILED
+        assert get_all_locks() == []
+        cleanup_events = [e for e in get_recent_events(limit=10) if e.event == EventType.AGENT_CLEANUP]
+        assert len(cleanup_events) == 2
+
+    def test_alive_pids_windows_single_tasklist(self, monkeypatch):
+        """На Windows все PID проверяются одним вызовом tasklist."""
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            stdout = b'"System","4","Services","0","152 K"\r\n"\x8f\xe0\xae\xe6.exe","4242","Console","1","9 K"\r\n'
+            return subprocess.CompletedProcess(cmd, 0, stdout=stdout)
+
+        monkeypatch.setattr("swarm.db.platform.system", lambda: "Windows")
+        monkeypatch.setattr("swarm.db.subprocess.run", fake_run)
+
+        assert alive_pids({4242, 4343, 5000}) == {4242}
+        assert calls == [["tasklist", "/FO", "CSV", "/NH"]]
+
+    def test_alive_pids_falls_back_to_per_pid_check(self, monkeypatch):
+        """Вне Windows (или без tasklist) PID проверяются по одному."""
+        monkeypatch.setattr("swarm.db.platform.system", lambda: "Linux")
+        monkeypatch.setattr("swarm.db.is_process_alive", lambda pid: pid % 2 == 0)
+
+        assert alive_pids({1, 2, 3, 4}) == {2, 4}
+
+    @pytest.mark.parametrize(
+        ("check_pid", "expected"),
+        [(True, ["fresh", "stale-pid"]), (False, ["fresh"])],
+    )
+    def test_cleanup_by_heartbeat_timeout(self, temp_db, monkeypatch, check_pid, expected):
+        """По таймауту удаляются агенты без PID, а без check_pid — все с просроченным heartbeat."""
+        register_agent("token-fresh", "claude", "fresh", "developer", pid=5001)
+        register_agent("token-stale-pid", "claude", "stale-pid", "developer", pid=5002)
+        register_agent("token-stale", "claude", "stale", "developer")
+
+        db_path = Path.cwd() / DB_FILENAME
+        with sqlite3.connect(str(db_path)) as conn:
+            conn.execute(
+                "UPDATE agents SET last_heartbeat = datetime('now', '-31 minutes') WHERE name != ?",
+                ("fresh",),
+            )
+            conn.commit()
+
+        monkeypatch.setattr("swarm.db.is_process_alive", lambda pid: True)
+
+        removed = cleanup_dead_agents(timeout_minutes=30, check_pid=check_pid)
+
+        assert removed == 3 - len(expected)
+        assert sorted(a.name for a in get_all_agents()) == expected
+
+    def test_cleanup_spares_agent_with_recycled_pid(self, temp_db, monkeypatch):
+        """Агент, зарегистрированный после проверки PID с тем же PID, не удаляется."""
+        register_agent("token-dead", "claude", "dead", "developer", pid=7001)
+
+        def probe_then_register(pids):
+            # Пока проверяем PID, ОС отдаёт тот же PID новому процессу агента
+            register_agent("token-new", "claude", "newcomer", "developer", pid=7001)
+            return set()
+
+        monkeypatch.setattr("swarm.db.alive_pids", probe_then_register)
+
+        removed = cleanup_dead_agents(timeout_minutes=30, check_pid=True)
+
+        assert removed == 1
+        assert [a.name for a in get_all_agents()] == ["newcomer"]
+
 
 class TestAssignTask:
     """Тесты назначения задач агентам."""
@@ -313,9 +526,21 @@ class TestAssignTask:
         result = assign_task_to_agent(99999, "any-agent")
         assert result is False
 
+    def test_assign_done_task(self, temp_db):
+        """Завершённую задачу переназначить нельзя, target_name не меняется."""
+        task = create_task("Готово", priority=1)
+        force_close_task(task.task_id, "Закрыта")
+
+        assert assign_task_to_agent(task.task_id, "late-agent") is False
+        assert get_task(task.task_id).target_name is None
+
 
 class TestForceCloseTask:
-    """Тесты принудительного закрытия задач."""
+    """Тесты принудительного закрытия задач (с UPDATE ... RETURNING и без него)."""
+
+    @pytest.fixture(autouse=True, params=[True, False], ids=["returning", "select"])
+    def _returning_mode(self, request, monkeypatch):
+        monkeypatch.setattr("swarm.db._HAS_RETURNING", request.param)
 
     def test_force_close_task(self, temp_db):
         """Принудительное закрытие задачи переводит её в done."""
@@ -450,6 +675,12 @@ class TestGetAgentByName:
         """Возвращает None для несуществующего имени."""
         assert get_agent_by_name("ghost") is None
 
+    def test_get_agent_by_id(self, temp_db):
+        """Находит агента по ID и возвращает None для неизвестного."""
+        agent = register_agent("tok-id1", "claude", "by-id", "developer")
+        assert get_agent_by_id(agent.agent_id) == agent
+        assert get_agent_by_id(agent.agent_id + 100) is None
+
 
 class TestGetAllLocks:
     """Тесты получения всех блокировок."""
@@ -724,6 +955,72 @@ class TestEventLogging:
         events_zero = get_recent_events(limit=100, since_hours=0.0001)
         assert isinstance(events_zero, list)
 
+    def test_log_events_bulk(self, sample_agent):
+        """log_events пишет пачку событий в порядке передачи."""
+        log_events(
+            [
+                (EventType.AGENT_STARTED, None, sample_agent.agent_id, "first"),
+                (EventType.ERROR, None, None, "second"),
+            ]
+        )
+        events = get_recent_events(limit=2)
+        assert [(e.event, e.agent_id, e.message) for e in reversed(events)] == [
+            (EventType.AGENT_STARTED, sample_agent.agent_id, "first"),
+            (EventType.ERROR, None, "second"),
+        ]
+
+    def test_recent_events_filters_use_index(self, temp_db):
+        """Лента и фильтры по задаче/агенту/времени идут по индексам без сортировки в памяти."""
+        with sqlite3.connect(temp_db / DB_FILENAME) as conn:
+            for where, params in (
+                ("1=1", ()),
+                ("timestamp >= ?", ("2024-01-01 00:00:00",)),
+                ("task_id = ?", (1,)),
+                ("agent_id = ?", (1,)),
+            ):
+                plan = conn.execute(
+                    f"EXPLAIN QUERY PLAN SELECT * FROM task_log WHERE {where} "
+                    "ORDER BY timestamp DESC, log_id DESC LIMIT ?",
+                    (*params, 10),
+                ).fetchall()
+                details = " ".join(row[3] for row in plan)
+                assert "USING INDEX" in details
+                assert "TEMP B-TREE" not in details
+
+    def test_task_filters_use_index(self, temp_db):
+        """Незавершённые задачи читаются по частичному индексу без сортировки, очистка — по исполнителю."""
+        with sqlite3.connect(temp_db / DB_FILENAME) as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE status != ? ORDER BY priority ASC, task_id ASC",
+                ("done",),
+            ).fetchall()
+            details = " ".join(row[3] for row in plan)
+            assert "idx_tasks_active" in details
+            assert "TEMP B-TREE" not in details
+
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE assigned_to IN (?, ?) AND status = ?",
+                (1, 2, "in_progress"),
+            ).fetchall()
+            assert "idx_tasks_assigned_status" in " ".join(row[3] for row in plan)
+
+    def test_claim_and_lock_queries_use_index(self, temp_db):
+        """Выбор следующей задачи и снятие блокировок по задаче/агенту не сканируют таблицы."""
+        with sqlite3.connect(temp_db / DB_FILENAME) as conn:
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN {_CLAIM_CANDIDATE_SQL}", ("developer", "agent", "claude")
+            ).fetchall()
+            details = " ".join(row[3] for row in plan)
+            assert "idx_tasks_status_priority" in details
+            assert "TEMP B-TREE" not in details
+            # Зависимость — точечный поиск по ключу, без выборки всех done-задач
+            assert "SEARCH d USING INTEGER PRIMARY KEY" in details
+            assert "LIST SUBQUERY" not in details
+
+            for column in ("task_id", "locked_by", "file_path"):
+                plan = conn.execute(f"EXPLAIN QUERY PLAN DELETE FROM file_locks WHERE {column} = ?", (1,)).fetchall()
+                assert "SCAN" not in " ".join(row[3] for row in plan)
+
     def test_cleanup_dead_agents_logs_event(self, temp_db):
         """Очистка мёртвых агентов записывает agent_cleanup в лог."""
         agent = register_agent("tok-log6", "claude", "logger-6", "developer", pid=999999)
@@ -741,6 +1038,24 @@ class TestEventLogging:
         assert EventType.AGENT_CLEANUP.value == "agent_cleanup"
 
 
+class TestSnapshot:
+    """Тесты среза состояния для дашбордов."""
+
+    def test_snapshot_matches_helpers(self, sample_agent, sample_task):
+        """Срез совпадает с отдельными выборками и индексирует агентов."""
+        try_lock_file(sample_agent.agent_id, sample_task.task_id, "a.py")
+        snap = snapshot(events_limit=5)
+
+        assert snap.agents == get_all_agents()
+        assert snap.tasks == get_all_tasks()
+        assert snap.locks == get_all_locks()
+        assert snap.events == get_recent_events(limit=5)
+        assert snap.agents_by_id == {sample_agent.agent_id: snap.agents[0]}
+
+        with get_connection() as conn:
+            assert not conn.in_transaction
+
+
 class TestLaunchSessions:
     """Тесты launch sessions для терминальной оркестрации."""
 
@@ -977,6 +1292,46 @@ class TestCreateTaskTransaction:
         assert task.task_id is not None
         assert task.depends_on is None
 
+    def test_create_tasks_bulk(self, temp_db):
+        """Пачка задач создаётся одной транзакцией, ID возвращаются по порядку."""
+        first = create_task("До пачки")
+        ids = create_tasks_bulk(
+            [
+                ("Первая", 1, None, None, "developer", None),
+                ("Вторая", 2, "claude", None, None, first.task_id),
+                ("Третья", 3, None, "bob", None, None),
+            ]
+        )
+
+        assert ids == [first.task_id + 1, first.task_id + 2, first.task_id + 3]
+        assert [get_task(task_id).description for task_id in ids] == ["Первая", "Вторая", "Третья"]
+        assert get_task(ids[1]).depends_on == first.task_id
+        assert create_tasks_bulk([]) == []
+
+    def test_create_tasks_bulk_is_all_or_nothing(self, temp_db, monkeypatch):
+        """Цикл в зависимостях отменяет всю пачку."""
+        task = create_task("Есть")
+        monkeypatch.setattr("swarm.db._has_dependency_cycle", lambda conn, depends_on: True)
+
+        with pytest.raises(ValueError, match="цикл"):
+            create_tasks_bulk([("A", 3, None, None, None, None), ("B", 3, None, None, None, task.task_id)])
+
+        assert [t.task_id for t in get_all_tasks()] == [task.task_id]
+
+    @pytest.mark.parametrize("has_returning", [True, False])
+    def test_insert_returns_stored_row(self, temp_db, monkeypatch, has_returning):
+        """register_agent/create_task возвращают сохранённую строку с RETURNING и без него."""
+        monkeypatch.setattr("swarm.db._HAS_RETURNING", has_returning)
+
+        agent = register_agent("tok-ret", "claude", "ret-agent", "dev", pid=42)
+        task = create_task("Задача", priority=2, target_role="dev")
+
+        assert agent == get_agent_by_session("tok-ret")
+        assert agent.pid == 42
+        assert agent.last_heartbeat is not None
+        assert task == get_task(task.task_id)
+        assert task.target_role == "dev"
+
 
 class TestForceCloseLogging:
     """Тесты КРИТ-5: force_close_task логирует ровно одно событие."""
@@ -1068,3 +1423,16 @@ class TestSessionTokenEncoding:
         assert decoded == token
 
         os.environ.pop("SWARM_AGENT", None)
+
+    def test_load_falls_back_to_legacy_path(self, temp_db, monkeypatch):
+        """Без файла в .swarm/sessions/ токен читается из корня (legacy)."""
+        monkeypatch.setenv("SWARM_AGENT", "legacy-agent")
+        (Path.cwd() / ".swarm_session_legacy-agent").write_text("legacy-token\n", encoding="utf-8")
+
+        assert load_session_token(directory=Path.cwd()) == "legacy-token"
+
+    def test_load_missing_session_returns_none(self, temp_db, monkeypatch):
+        """Нет ни нового, ни legacy-файла — None."""
+        monkeypatch.setenv("SWARM_AGENT", "ghost-agent")
+
+        assert load_session_token(directory=Path.cwd()) is None
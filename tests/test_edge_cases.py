@@ -81,14 +81,11 @@ class TestLockEdgeCases:
 class TestLockUnlockCLIEdgeCases:
   """Граничные случаи lock/unlock через CLI."""
 
-  def test_unlock_foreign_lock_via_cli(self, tmp_path, monkeypatch):
+  def test_unlock_foreign_lock_via_cli(self, initialized_project, make_agent, monkeypatch):
     """Через CLI агент не может разблокировать чужой файл."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     # Создаём задачу и первого агента
     runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "locker", "--role", "developer"])
+    make_agent("locker")
     runner.invoke(app, ["next"])
     runner.invoke(app, ["lock", "shared.py"])
 
@@ -97,7 +94,7 @@ class TestLockUnlockCLIEdgeCases:
     monkeypatch.delenv("SWARM_SESSION", raising=False)
 
     # Регистрируем второго агента
-    runner.invoke(app, ["join", "--cli", "codex", "--name", "intruder", "--role", "developer"])
+    make_agent("intruder", cli_type="codex")
 
     # Второй агент пытается разблокировать файл без --force
     result = runner.invoke(app, ["unlock", "--file", "shared.py"])
@@ -105,12 +102,10 @@ class TestLockUnlockCLIEdgeCases:
     # Должен быть отказ (exit_code=1) — файл заблокирован другим агентом
     assert result.exit_code == 1
 
-  def test_unlock_without_agent_and_env_fails(self, tmp_path, monkeypatch):
+  def test_unlock_without_agent_and_env_fails(self, initialized_project, make_agent, monkeypatch):
     """unlock --file X без --agent и без env vars выдаёт ошибку с подсказкой."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
     runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "locker", "--role", "developer"])
+    make_agent("locker")
     runner.invoke(app, ["next"])
     runner.invoke(app, ["lock", "shared.py"])
 
@@ -123,12 +118,10 @@ class TestLockUnlockCLIEdgeCases:
     assert result.exit_code == 1
     assert "--agent" in result.stdout
 
-  def test_lock_idempotent_via_cli(self, tmp_path, monkeypatch):
+  def test_lock_idempotent_via_cli(self, initialized_project, make_agent):
     """Повторная блокировка того же файла через CLI — идемпотентна."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
     runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "repeat", "--role", "developer"])
+    make_agent("repeat")
     runner.invoke(app, ["next"])
 
     # Первая блокировка
@@ -149,11 +142,8 @@ class TestLockUnlockCLIEdgeCases:
 class TestTaskCLIEdgeCases:
   """Граничные случаи задач через CLI."""
 
-  def test_task_add_priority_zero(self, tmp_path, monkeypatch):
+  def test_task_add_priority_zero(self, initialized_project):
     """Приоритет 0 — невалидный, должна быть ошибка."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     result = runner.invoke(
       app, ["task", "add", "--desc", "Задача", "--priority", "0"]
     )
@@ -161,11 +151,8 @@ class TestTaskCLIEdgeCases:
     assert result.exit_code == 1
     assert "Приоритет должен быть от 1 до 5" in result.stdout
 
-  def test_task_add_priority_six(self, tmp_path, monkeypatch):
+  def test_task_add_priority_six(self, initialized_project):
     """Приоритет 6 — невалидный, должна быть ошибка."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     result = runner.invoke(
       app, ["task", "add", "--desc", "Задача", "--priority", "6"]
     )
@@ -173,11 +160,8 @@ class TestTaskCLIEdgeCases:
     assert result.exit_code == 1
     assert "Приоритет должен быть от 1 до 5" in result.stdout
 
-  def test_task_add_valid_priority_boundaries(self, tmp_path, monkeypatch):
+  def test_task_add_valid_priority_boundaries(self, initialized_project):
     """Приоритеты 1 и 5 — граничные допустимые значения."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     result1 = runner.invoke(
       app, ["task", "add", "--desc", "Минимальный приоритет", "--priority", "1"]
     )
@@ -188,11 +172,8 @@ class TestTaskCLIEdgeCases:
     )
     assert result5.exit_code == 0
 
-  def test_task_add_with_nonexistent_depends_on(self, tmp_path, monkeypatch):
+  def test_task_add_with_nonexistent_depends_on(self, initialized_project):
     """Зависимость от несуществующей задачи вызывает ошибку."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     result = runner.invoke(
       app, ["task", "add", "--desc", "Зависимая", "--depends-on", "999"]
     )
@@ -200,10 +181,8 @@ class TestTaskCLIEdgeCases:
     assert result.exit_code == 1
     assert "не найдена" in result.stdout
 
-  def test_task_assign_to_done_task(self, tmp_path, monkeypatch):
+  def test_task_assign_to_done_task(self, initialized_project):
     """Назначение задачи, которая уже завершена (done)."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
     runner.invoke(app, ["task", "add", "--desc", "Для завершения", "--priority", "1"])
 
     # Закрываем задачу принудительно
@@ -216,12 +195,10 @@ class TestTaskCLIEdgeCases:
     assert result.exit_code == 0
     assert "уже завершена" in result.stdout
 
-  def test_task_assign_to_in_progress_task(self, tmp_path, monkeypatch):
+  def test_task_assign_to_in_progress_task(self, initialized_project, make_agent, monkeypatch):
     """Назначение задачи, которая уже выполняется (in_progress)."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
     runner.invoke(app, ["task", "add", "--desc", "В работе", "--priority", "1"])
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "busy-agent", "--role", "developer"])
+    make_agent("busy-agent")
     runner.invoke(app, ["next"])
 
     # Убираем сессию агента, чтобы стать Лидером
@@ -283,16 +260,14 @@ class TestTaskDBEdgeCases:
 class TestAgentsCLIEdgeCases:
   """Граничные случаи команды agents через CLI."""
 
-  def test_agents_cleanup_force(self, tmp_path, monkeypatch):
+  def test_agents_cleanup_force(self, initialized_project, make_agent, monkeypatch):
     """agents --cleanup --force удаляет всех агентов."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "agent-a", "--role", "developer"])
+    make_agent("agent-a")
 
     # Очищаем сессию для регистрации второго
     monkeypatch.delenv("SWARM_AGENT", raising=False)
     monkeypatch.delenv("SWARM_SESSION", raising=False)
-    runner.invoke(app, ["join", "--cli", "codex", "--name", "agent-b", "--role", "tester"])
+    make_agent("agent-b", "tester", cli_type="codex")
 
     # Очищаем сессию чтобы команда agents не привязывалась к агенту
     monkeypatch.delenv("SWARM_AGENT", raising=False)
@@ -306,11 +281,9 @@ class TestAgentsCLIEdgeCases:
     # После удаления список пуст
     assert "агентов нет" in result.stdout
 
-  def test_agents_cleanup_no_dead(self, tmp_path, monkeypatch):
+  def test_agents_cleanup_no_dead(self, initialized_project, make_agent, monkeypatch):
     """agents --cleanup без мёртвых агентов ничего не удаляет."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "alive", "--role", "developer"])
+    make_agent("alive")
 
     # Очищаем сессию чтобы не привязываться к агенту
     monkeypatch.delenv("SWARM_AGENT", raising=False)
@@ -322,12 +295,10 @@ class TestAgentsCLIEdgeCases:
     # Агент жив (свежий heartbeat), не должен быть удалён
     assert "alive" in result.stdout
 
-  def test_agents_cleanup_force_releases_tasks(self, tmp_path, monkeypatch):
+  def test_agents_cleanup_force_releases_tasks(self, initialized_project, make_agent, monkeypatch):
     """agents --cleanup --force освобождает задачи in_progress."""
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
     runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "cleaner", "--role", "developer"])
+    make_agent("cleaner")
     runner.invoke(app, ["next"])
 
     # Очищаем сессию
@@ -7,10 +7,19 @@
 
 from unittest.mock import patch
 
+import pytest
 from typer.testing import CliRunner
 
 from swarm.cli import app
-from swarm.db import get_agent_by_name
+from swarm.db import (
+  get_agent_by_name,
+  get_file_lock,
+  get_recent_events,
+  register_agent,
+  try_lock_file,
+  unlock_file,
+)
+from swarm.models import EventType
 
 runner = CliRunner()
 
@@ -18,27 +27,24 @@ runner = CliRunner()
 class TestLockTimeout:
   """Тесты таймаута блокировки (КРИТ-2)."""
 
-  def test_lock_timeout_restores_agent_status(self, tmp_path, monkeypatch):
+  def test_lock_timeout_restores_agent_status(self, initialized_project, make_agent, monkeypatch):
     """
     КРИТ-2: При таймауте ожидания блокировки статус агента
     должен быть восстановлен в WORKING, а не оставаться WAITING.
     """
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     # Создаём задачу и двух агентов
     runner.invoke(app, ["task", "add", "--desc", "Задача 1", "--priority", "1"])
     runner.invoke(app, ["task", "add", "--desc", "Задача 2", "--priority", "2"])
 
     # Первый агент захватывает файл
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "holder", "--role", "developer"])
+    make_agent("holder")
     runner.invoke(app, ["next"])
     runner.invoke(app, ["lock", "shared.py"])
 
     # Второй агент пытается заблокировать тот же файл с маленьким таймаутом
     monkeypatch.delenv("SWARM_AGENT", raising=False)
     monkeypatch.delenv("SWARM_SESSION", raising=False)
-    runner.invoke(app, ["join", "--cli", "codex", "--name", "waiter", "--role", "developer"])
+    make_agent("waiter", cli_type="codex")
     runner.invoke(app, ["next"])
 
     # Патчим time.sleep чтобы не ждать реально, и ставим таймаут 0
@@ -57,27 +63,24 @@ class TestLockTimeout:
     # Статус должен быть WORKING (восстановлен)
     assert agent.status.value == "working"
 
-  def test_lock_timeout_without_waiting_state(self, tmp_path, monkeypatch):
+  def test_lock_timeout_without_waiting_state(self, initialized_project, make_agent, monkeypatch):
     """
     Если таймаут наступил до того как агент вошёл в состояние WAITING
     (timeout=0 и файл свободен — маловероятный сценарий),
     статус агента не должен измениться на WAITING.
     """
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     runner.invoke(app, ["task", "add", "--desc", "Задача", "--priority", "1"])
     runner.invoke(app, ["task", "add", "--desc", "Задача 2", "--priority", "2"])
 
     # Первый агент блокирует файл
-    runner.invoke(app, ["join", "--cli", "claude", "--name", "blocker", "--role", "developer"])
+    make_agent("blocker")
     runner.invoke(app, ["next"])
     runner.invoke(app, ["lock", "file.py"])
 
     # Второй агент с таймаутом 0
     monkeypatch.delenv("SWARM_AGENT", raising=False)
     monkeypatch.delenv("SWARM_SESSION", raising=False)
-    runner.invoke(app, ["join", "--cli", "codex", "--name", "fast-agent", "--role", "developer"])
+    make_agent("fast-agent", cli_type="codex")
     runner.invoke(app, ["next"])
 
     with patch("swarm.commands.lock.time.sleep"):
@@ -89,3 +92,88 @@ class TestLockTimeout:
     assert agent is not None
     # Статус не должен быть WAITING
     assert agent.status.value != "waiting"
+
+
+class TestLockWaiting:
+  """Тесты цикла ожидания блокировки."""
+
+  def test_holder_looked_up_once_and_sleep_capped(self, initialized_project, make_agent, monkeypatch):
+    """Событие ожидания пишется один раз, опрос растёт до потолка и не превышает таймаут."""
+    runner.invoke(app, ["task", "add", "--desc", "Задача 1", "--priority", "1"])
+    runner.invoke(app, ["task", "add", "--desc", "Задача 2", "--priority", "2"])
+
+    make_agent("holder")
+    runner.invoke(app, ["next"])
+    runner.invoke(app, ["lock", "shared.py"])
+
+    monkeypatch.delenv("SWARM_AGENT", raising=False)
+    monkeypatch.delenv("SWARM_SESSION", raising=False)
+    make_agent("waiter", cli_type="codex")
+    runner.invoke(app, ["next"])
+
+    clock = [1000.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+      sleeps.append(seconds)
+      clock[0] += seconds
+
+    with (
+      patch("swarm.commands.lock.time.time", side_effect=lambda: clock[0]),
+      patch("swarm.commands.lock.time.sleep", side_effect=fake_sleep),
+      patch("swarm.commands.lock.random.uniform", return_value=1.0),
+      patch("swarm.commands.lock.get_file_lock", wraps=get_file_lock) as lookup,
+      patch("swarm.commands.lock.update_agent_heartbeat") as heartbeat,
+    ):
+      result = runner.invoke(app, ["lock", "shared.py", "--timeout", "90", "--agent", "waiter"])
+
+    assert result.exit_code == 1
+    # Владелец не менялся — одно событие ожидания на все попытки
+    assert lookup.call_count == len(sleeps) + 1
+    waits = [e for e in get_recent_events(limit=50) if e.event == EventType.WAITING_FOR_LOCK]
+    assert len(waits) == 1
+    # Экспоненциальный рост от 50 мс до потолка 15 с, последний сон — остаток таймаута
+    assert sleeps[:10] == pytest.approx([0.05, 0.1, 0.2, 0.4, 0.8, 1.6, 3.2, 6.4, 12.8, 15.0])
+    assert sum(sleeps) == pytest.approx(90.0)
+    assert max(sleeps) == 15.0
+    # Heartbeat раз в 30 с, а не на каждой итерации
+    assert heartbeat.call_count == 2
+
+  def test_waiting_event_logged_on_holder_change(self, initialized_project, make_agent, monkeypatch):
+    """При смене владельца файла пишется новое событие ожидания."""
+    runner.invoke(app, ["task", "add", "--desc", "Задача 1", "--priority", "1"])
+    runner.invoke(app, ["task", "add", "--desc", "Задача 2", "--priority", "2"])
+
+    make_agent("holder")
+    runner.invoke(app, ["next"])
+    runner.invoke(app, ["lock", "shared.py"])
+    holder = get_agent_by_name("holder")
+    other = register_agent("tok-other", "gemini", "other", "developer")
+
+    monkeypatch.delenv("SWARM_AGENT", raising=False)
+    monkeypatch.delenv("SWARM_SESSION", raising=False)
+    make_agent("waiter", cli_type="codex")
+    runner.invoke(app, ["next"])
+
+    clock = [1000.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+      sleeps.append(seconds)
+      clock[0] += seconds
+      if len(sleeps) == 3:
+        # Файл переходит к другому агенту, пока waiter ждёт
+        unlock_file("shared.py", force=True)
+        try_lock_file(other.agent_id, holder.current_task_id, "shared.py")
+
+    with (
+      patch("swarm.commands.lock.time.time", side_effect=lambda: clock[0]),
+      patch("swarm.commands.lock.time.sleep", side_effect=fake_sleep),
+    ):
+      result = runner.invoke(app, ["lock", "shared.py", "--timeout", "5", "--agent", "waiter"])
+
+    assert result.exit_code == 1
+    waits = [e.message for e in get_recent_events(limit=50) if e.event == EventType.WAITING_FOR_LOCK]
+    assert len(waits) == 2
+    assert "other" in waits[0]
+    assert "holder" in waits[1]
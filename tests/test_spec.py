@@ -225,6 +225,15 @@ class TestValidateSpecNegative:
     with pytest.raises(ValueError, match="cli"):
       _validate_spec(data)
 
+  def test_cli_type_not_string(self):
+    """Нестроковый (нехешируемый) cli вызывает ValueError, а не TypeError."""
+    data = _make_valid_spec(
+      agents=[{"cli": ["claude"], "name": "bad-cli", "role": "developer"}],
+      layout={"mode": "single", "max_panes_per_window": 4},
+    )
+    with pytest.raises(ValueError, match="cli"):
+      _validate_spec(data)
+
   def test_missing_agent_name(self):
     """Отсутствующее имя агента вызывает ValueError."""
     data = _make_valid_spec(
@@ -272,6 +281,15 @@ class TestValidateSpecNegative:
     with pytest.raises(ValueError, match="role"):
       _validate_spec(data)
 
+  def test_role_not_string(self):
+    """Нестроковая (нехешируемая) роль вызывает ValueError, а не TypeError."""
+    data = _make_valid_spec(
+      agents=[{"cli": "claude", "name": "agent-1", "role": ["developer"]}],
+      layout={"mode": "single", "max_panes_per_window": 4},
+    )
+    with pytest.raises(ValueError, match="role"):
+      _validate_spec(data)
+
 
 class TestSaveAndLoadSpec:
   """Тесты round-trip: save_launch_spec -> load_launch_spec."""
@@ -2,11 +2,17 @@
 Тесты распределения и выполнения задач.
 """
 
+import sqlite3
+from pathlib import Path
+
+import pytest
 
 from swarm.db import (
+    DB_FILENAME,
     claim_next_task,
     complete_task,
     create_task,
+    create_tasks_bulk,
     get_agent_by_session,
     get_file_lock,
     get_task,
@@ -18,8 +24,12 @@ from swarm.models import AgentStatus, TaskStatus
 
 
 class TestTaskClaiming:
-    """Тесты захвата задач."""
-    
+    """Тесты захвата задач (с UPDATE ... RETURNING и без него)."""
+
+    @pytest.fixture(autouse=True, params=[True, False], ids=["returning", "select"])
+    def _returning_mode(self, request, monkeypatch):
+        monkeypatch.setattr("swarm.db._HAS_RETURNING", request.param)
+
     def test_claim_task(self, sample_agent, sample_task):
         """Проверяет базовый захват задачи."""
         task = claim_next_task(sample_agent)
@@ -34,71 +44,55 @@ class TestTaskClaiming:
         task = claim_next_task(sample_agent)
         
         assert task is None
+
+    def test_claim_no_tasks_updates_heartbeat(self, sample_agent):
+        """Пустая очередь всё равно обновляет heartbeat в той же транзакции."""
+        with sqlite3.connect(str(Path.cwd() / DB_FILENAME)) as conn:
+            conn.execute("UPDATE agents SET last_heartbeat = datetime('now', '-1 hour')")
+        stale = get_agent_by_session(sample_agent.session_token).last_heartbeat
+
+        assert claim_next_task(sample_agent) is None
+        assert get_agent_by_session(sample_agent.session_token).last_heartbeat > stale
     
     def test_claim_respects_priority(self, temp_db):
         """Проверяет приоритет при захвате."""
         agent = register_agent("token", "claude", "agent", "developer")
         
         # Создаём задачи с разными приоритетами
-        create_task("Низкий приоритет", priority=5)
-        high = create_task("Высокий приоритет", priority=1)
-        create_task("Средний приоритет", priority=3)
+        _, high_id, _ = create_tasks_bulk(
+            [
+                ("Низкий приоритет", 5, None, None, None, None),
+                ("Высокий приоритет", 1, None, None, None, None),
+                ("Средний приоритет", 3, None, None, None, None),
+            ]
+        )
         
         # Должна вернуться задача с высоким приоритетом
         task = claim_next_task(agent)
         
-        assert task.task_id == high.task_id
+        assert task.task_id == high_id
         assert task.priority == 1
     
-    def test_claim_respects_role_filter(self, temp_db):
-        """Проверяет фильтрацию по роли."""
-        developer = register_agent("dev-token", "claude", "dev", "developer")
-        architect = register_agent("arch-token", "claude", "arch", "architect")
-        
-        # Задача только для архитектора
-        task = create_task("Дизайн системы", target_role="architect")
-        
-        # Developer не должен получить задачу
-        dev_task = claim_next_task(developer)
-        assert dev_task is None
-        
-        # Architect должен получить
-        arch_task = claim_next_task(architect)
-        assert arch_task is not None
-        assert arch_task.task_id == task.task_id
-    
-    def test_claim_respects_name_filter(self, temp_db):
-        """Проверяет фильтрацию по имени."""
-        alice = register_agent("alice-token", "claude", "alice", "developer")
-        bob = register_agent("bob-token", "claude", "bob", "developer")
-        
-        # Задача только для alice
-        task = create_task("Задача для Alice", target_name="alice")
-        
-        # Bob не должен получить
-        bob_task = claim_next_task(bob)
-        assert bob_task is None
-        
-        # Alice должна получить
-        alice_task = claim_next_task(alice)
-        assert alice_task is not None
-        assert alice_task.task_id == task.task_id
-    
-    def test_claim_respects_cli_filter(self, temp_db):
-        """Проверяет фильтрацию по типу CLI."""
-        claude_agent = register_agent("claude-token", "claude", "agent1", "developer")
-        codex_agent = register_agent("codex-token", "codex", "agent2", "developer")
-        
-        # Задача только для codex
-        create_task("Задача для Codex", target_cli="codex")
-
-        # Claude не должен получить
-        claude_task = claim_next_task(claude_agent)
-        assert claude_task is None
-        
-        # Codex должен получить
-        codex_task = claim_next_task(codex_agent)
-        assert codex_task is not None
+    @pytest.mark.parametrize(
+        ("task_filter", "matching", "other"),
+        [
+            ({"target_role": "architect"}, ("claude", "arch", "architect"), ("claude", "dev", "developer")),
+            ({"target_name": "alice"}, ("claude", "alice", "developer"), ("claude", "bob", "developer")),
+            ({"target_cli": "codex"}, ("codex", "agent2", "developer"), ("claude", "agent1", "developer")),
+        ],
+        ids=["role", "name", "cli"],
+    )
+    def test_claim_respects_filter(self, temp_db, task_filter, matching, other):
+        """Задачу с фильтром (роль/имя/CLI) получает только подходящий агент."""
+        other_agent = register_agent("other-token", *other)
+        matching_agent = register_agent("matching-token", *matching)
+        task = create_task("Задача с фильтром", **task_filter)
+
+        assert claim_next_task(other_agent) is None
+
+        claimed = claim_next_task(matching_agent)
+        assert claimed is not None
+        assert claimed.task_id == task.task_id
     
     def test_claim_respects_dependency(self, temp_db):
         """Проверяет зависимости задач."""
@@ -41,14 +41,11 @@ def _make_spec_file(tmp_path, agents, layout_mode="mixed"):
 class TestStopCommandFallback:
   """Тесты КРИТ-6: stop_command fallback использует taskkill на Windows."""
 
-  def test_stop_fallback_uses_taskkill_on_windows(self, tmp_path, monkeypatch):
+  def test_stop_fallback_uses_taskkill_on_windows(self, initialized_project, tmp_path, monkeypatch):
     """
     КРИТ-6: При fallback через БД PID, на Windows должен использоваться
     taskkill /T /F вместо os.kill для завершения дерева процессов.
     """
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     from swarm.commands import terminal as terminal_cmd
 
     monkeypatch.setattr(terminal_cmd, "run_preflight", lambda spec, require_wt=True: [])
@@ -98,13 +95,10 @@ class TestStopCommandFallback:
       assert "/F" in cmd_args, f"taskkill должен содержать /F: {cmd_args}"
 
   @pytest.mark.skipif(sys.platform == "win32", reason="PosixPath недоступен на Windows")
-  def test_stop_fallback_uses_os_kill_on_linux(self, tmp_path, monkeypatch):
+  def test_stop_fallback_uses_os_kill_on_linux(self, initialized_project, tmp_path, monkeypatch):
     """
     На не-Windows системах fallback должен использовать os.kill.
     """
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     from swarm.commands import terminal as terminal_cmd
 
     monkeypatch.setattr(terminal_cmd, "run_preflight", lambda spec, require_wt=True: [])
@@ -139,14 +133,11 @@ class TestStopCommandFallback:
 class TestExcludeCliStatus:
   """Тесты ВАЖ-10: при exclude-cli с total_launchable==0 статус НЕ LAUNCHED."""
 
-  def test_all_excluded_status_not_launched(self, tmp_path, monkeypatch):
+  def test_all_excluded_status_not_launched(self, initialized_project, tmp_path, monkeypatch):
     """
     ВАЖ-10: Если все агенты исключены через --exclude-cli,
     статус launch session НЕ должен быть LAUNCHED.
     """
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     from swarm.commands import terminal as terminal_cmd
 
     monkeypatch.setattr(terminal_cmd, "run_preflight", lambda spec, require_wt=True: [])
@@ -179,14 +170,11 @@ class TestExcludeCliStatus:
 class TestLayoutModePreservation:
   """Тесты ВАЖ-9: явный layout mode из spec сохраняется при запуске."""
 
-  def test_explicit_layout_mode_preserved(self, tmp_path, monkeypatch):
+  def test_explicit_layout_mode_preserved(self, initialized_project, tmp_path, monkeypatch):
     """
     ВАЖ-9: Если в spec задан layout.mode='mixed', при создании launch_spec
     для launchable агентов он должен сохраниться, а не замениться на auto.
     """
-    monkeypatch.chdir(tmp_path)
-    runner.invoke(app, ["init"])
-
     from swarm.commands import terminal as terminal_cmd
 
     monkeypatch.setattr(terminal_cmd, "run_preflight", lambda spec, require_wt=True: [])
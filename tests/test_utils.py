@@ -1,12 +1,14 @@
 """
 Тесты утилит SWARM.
 
-Проверяет кеширование и обработку ошибок в get_version().
+Проверяет кеширование и обработку ошибок в get_version(),
+а также общий экземпляр консоли.
 """
 
 from unittest.mock import MagicMock, patch
 
-from swarm.utils import get_version
+from swarm.models import TaskStatus
+from swarm.utils import create_console, enum_markup, get_version, truncate, truncate_left
 
 
 class TestGetVersion:
@@ -74,3 +76,47 @@ class TestGetVersion:
 
       result = get_version()
       assert result == "unknown"
+
+
+class TestCreateConsole:
+  """Тесты функции create_console()."""
+
+  def test_returns_shared_instance(self):
+    """Все модули команд получают одну и ту же Console."""
+    assert create_console() is create_console()
+
+
+class TestTruncate:
+  """Тесты усечения строк для таблиц."""
+
+  def test_short_string_returned_as_is(self):
+    """Строка не длиннее лимита не копируется и не меняется."""
+    text = "a" * 10
+    assert truncate(text, 10) is text
+    assert truncate_left(text, 10) is text
+
+  def test_truncate_keeps_head(self):
+    """truncate оставляет начало строки и укладывается в лимит."""
+    assert truncate("abcdefghij", 8) == "abcde..."
+
+  def test_truncate_left_keeps_tail(self):
+    """truncate_left оставляет конец пути, многоточие настраивается."""
+    assert truncate_left("src/swarm/db.py", 10) == "...m/db.py"
+    assert truncate_left("src/swarm/db.py", 10, "…") == "…arm/db.py"
+
+
+
+class TestEnumMarkup:
+  """Тесты предрендера markup для значений enum."""
+
+  def test_covers_every_member_with_default(self):
+    """Каждое значение получает ячейку; без записи в styles — по default."""
+    cells = enum_markup(TaskStatus, {TaskStatus.DONE: ("dim", "✓")}, ("white", ""), "[{0}]{1} {value}[/{0}]")
+    assert set(cells) == set(TaskStatus)
+    assert cells[TaskStatus.DONE] == "[dim]✓ done[/dim]"
+    assert cells[TaskStatus.PENDING] == "[white] pending[/white]"
+
+  def test_string_entry_is_single_field(self):
+    """Строковая запись подставляется как единственное поле {0}."""
+    cells = enum_markup(TaskStatus, {TaskStatus.FAILED: "red"}, "white", "[{0}]{value}[/{0}]")
+    assert cells[TaskStatus.FAILED] == "[red]failed[/red]"